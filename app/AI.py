@@ -1,193 +1,785 @@
 import chess
 import math
 
+import evaluation
+import parallel
+
+from bitboard import Position
+from drops import drop_candidates
+from limits import SearchAborted, SearchLimits
+from ordering import MoveOrderer
+from stats import SearchStats
+from transposition import (EXACT, LOWER, UPPER, TranspositionTable, decode_move, drop_hash,
+                           encode_drop, encode_move, move_hash, pocket_hash, zobrist_hash)
 from utils import PIECE_VALUES, POSITION_VALUES
 
+# Tabla de transposiciones compartida por machine_move y put_piece. Se conserva
+# entre turnos, ya que la puntuación de una posición no depende de la partida.
+TRANSPOSITION_TABLE = TranspositionTable()
+
+# Movimientos asesinos e historial usados para ordenar los movimientos.
+MOVE_ORDERING = MoveOrderer()
+
+# Tabla de transposiciones y ordenamiento con que se busca cada movimiento de
+# la raíz salvo el primero (ver search_isolated). Cada búsqueda empieza con
+# ambos vacíos, así que su resultado es el mismo en este proceso y en
+# cualquier proceso trabajador. Basta con una tabla más pequeña que la
+# principal, ya que solo guarda la búsqueda de un movimiento.
+ISOLATED_TABLE_MB = 4
+ISOLATED_TABLE = TranspositionTable(ISOLATED_TABLE_MB)
+ISOLATED_ORDERING = MoveOrderer()
+
+# Presupuesto (tiempo y nodos) de la búsqueda en curso.
+SEARCH_LIMITS = SearchLimits()
+
+# Profundidad máxima por defecto de machine_move y put_piece.
+MAX_DEPTH = 3
+
+# Ventana de aspiración inicial alrededor de la puntuación de la iteración
+# anterior, y ancho a partir del cual se abre la ventana por completo.
+ASPIRATION_WINDOW = 20
+ASPIRATION_LIMIT = 500
+
+# Poda de movimiento nulo: si tras ceder el turno (y buscar NULL_MOVE_REDUCTION
+# niveles menos) el rival sigue sin poder evitar el corte, se poda el nodo.
+NULL_MOVE_PRUNING = True
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# Reducción de movimientos tardíos: los movimientos tranquilos a partir de la
+# posición LMR_MIN_INDEX se buscan LMR_REDUCTION niveles menos y solo se repiten
+# a profundidad completa si mejoran el mejor valor.
+LATE_MOVE_REDUCTIONS = True
+LMR_REDUCTION = 1
+LMR_MIN_DEPTH = 3
+LMR_MIN_INDEX = 3
+
+# Colocación de fichas: solo se prueban las DROP_CANDIDATES casillas más
+# prometedoras (y, si DROP_MARGIN no es None, las que no se alejan más de ese
+# margen de la mejor). Las colocaciones más profundas se limitan además con
+# DROP_SEARCH_CANDIDATES; para probar todas las casillas vacías en todo el
+# árbol hay que poner los tres en None.
+DROP_CANDIDATES = 12
+DROP_MARGIN = None
+
+# Evaluación en bloque de la frontera: en los nodos cuyos hijos son hojas se
+# evalúan todos los hijos con NumPy en una sola llamada (si está instalado).
+# Está desactivada porque con las pocas hojas de cada nodo (unas 35) la
+# llamada a NumPy cuesta más que las actualizaciones incrementales, que además
+# permiten cortar antes de evaluar todos los hijos.
+BATCH_EVALUATION = False
+
+# Casillas candidatas de las colocaciones más profundas del árbol, que siguen
+# a capturas de la variante y no a un movimiento de la raíz (None para no
+# limitarlas).
+DROP_SEARCH_CANDIDATES = 4
+
+# Respuestas del rival que se buscan como máximo al pensar durante su turno.
+PONDER_REPLIES = 8
+
+# Estadísticas de la búsqueda en curso (stats.SearchStats), o None si no se
+# miden. Cada punto de medida solo comprueba si es None, así que con la
+# medición desactivada la búsqueda casi no se ve afectada.
+SEARCH_STATS = None
+
+# Función que recibe las estadísticas al terminar cada búsqueda de
+# machine_move y put_piece (por ejemplo, print o logging.info), o None.
+STATS_CALLBACK = None
+
+# Libro de aperturas (book.OpeningBook) que machine_move y put_piece consultan
+# antes de buscar, o None para no usarlo. Con BOOK_RANDOM se elige entre las
+# jugadas del libro al azar según su peso, en vez de tomar la de mayor peso.
+OPENING_BOOK = None
+BOOK_RANDOM = False
+
+# Caché persistente de análisis (cache.AnalysisCache) con los resultados de
+# machine_move y put_piece de partidas y procesos anteriores, o None para no
+# usarla. Se consulta después del libro y solo guarda búsquedas que llegaron
+# a max_depth sin agotar el presupuesto.
+ANALYSIS_CACHE = None
+
+NULL_MOVE = chess.Move.null()
+
 # ============================================================
-#              MOVIMIENTOS ESTÁNDAR DE LAS FICHAS
+#                 EVALUACIÓN INCREMENTAL
 # ============================================================
 
-def machine_move(board):
+# Tabla precalculada con el valor (pieza + posición) de cada tipo de pieza en
+# cada casilla, indexada como PIECE_SQUARE_VALUES[color][tipo de pieza][casilla].
+# Se construye a partir de PIECE_VALUES y POSITION_VALUES, por lo que las
+# puntuaciones incrementales coinciden exactamente con las de evaluar el
+# tablero completo.
+PIECE_SQUARE_VALUES = [[None] * 7, [None] * 7]
+for _color in chess.COLORS:
+    for _piece_type in chess.PIECE_TYPES:
+        _symbol = chess.Piece(_piece_type, _color).symbol()
+        PIECE_SQUARE_VALUES[_color][_piece_type] = [
+            PIECE_VALUES[_symbol] + POSITION_VALUES[_symbol][square // 8][square % 8]
+            for square in chess.SQUARES
+        ]
+
+
+def evaluate_position(board):
     """
-    Realiza el movimiento por parte de la máquina.
+    Evalúa el tablero completo sin aplicar ningún movimiento. Solo se usa para
+    obtener la puntuación inicial de la búsqueda; a partir de ahí la puntuación
+    se actualiza con move_delta y drop_delta.
 
-        board : tablero de ajedrez.
+        board : estado del tablero.
     """
-    maximum = -(math.inf)
-    movement = ""
+    value = 0
+
+    for color in chess.COLORS:
+        for piece_type in chess.PIECE_TYPES:
+            table = PIECE_SQUARE_VALUES[color][piece_type]
+            for square in board.pieces(piece_type, color):
+                value += table[square]
 
-    # Obtenemos todos los movimientos legales disponibles en el tablero.
-    legal_moves = [str(mov) for mov in board.legal_moves]
+    return value
 
-    # Para cada movimiento legal se realiza la poda alpha-beta con una profundidad
-    # máxima de 3 y un indicador False para señalar que es el turno de la máquina.
-    for move in legal_moves:
-        result = alphabeta_pruning(board.copy(), move, 3, -(math.inf), math.inf, False)
 
-        # Se busca que el movimiento tenga el máximo valor.
-        if result > maximum:
-            movement = move
-            maximum = result
+def move_delta(board, move):
+    """
+    Calcula el cambio de puntuación que produce un movimiento, antes de
+    aplicarlo. Solo se tienen en cuenta las piezas que cambian: la pieza movida
+    (o promovida), la pieza capturada (incluida la captura al paso) y la torre
+    en el enroque.
 
-    return movement
+        board : estado del tablero antes del movimiento.
+        move : movimiento (chess.Move) a evaluar.
+    """
+    from_square = move.from_square
+    to_square = move.to_square
+
+    # El movimiento nulo no cambia ninguna pieza.
+    if from_square == to_square:
+        return 0
 
+    color = board.turn
+    piece_type = board.piece_type_at(from_square)
+    own = PIECE_SQUARE_VALUES[color]
 
-def alphabeta_pruning(board, movement, depth, alpha, beta, maximizing_player):
+    # La pieza sale de su casilla y llega a la de destino (promovida si aplica).
+    value = own[move.promotion or piece_type][to_square] - own[piece_type][from_square]
+
+    captured = board.piece_type_at(to_square)
+    if captured:
+        value -= PIECE_SQUARE_VALUES[not color][captured][to_square]
+
+    elif piece_type == chess.PAWN and (to_square - from_square) % 8:
+        # Captura al paso: el peón capturado está detrás de la casilla de destino.
+        captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+        value -= PIECE_SQUARE_VALUES[not color][chess.PAWN][captured_square]
+
+    elif piece_type == chess.KING and abs(to_square - from_square) == 2:
+        # Enroque: la torre pasa de la esquina a la casilla junto al rey.
+        rank = from_square - from_square % 8
+        if to_square > from_square:
+            value += own[chess.ROOK][rank + 5] - own[chess.ROOK][rank + 7]
+        else:
+            value += own[chess.ROOK][rank + 3] - own[chess.ROOK][rank]
+
+    return value
+
+
+def drop_delta(piece, square):
     """
-    Implementa la poda alpha-beta.
+    Calcula el cambio de puntuación al colocar una pieza en una casilla vacía.
 
-        board : estado actual del tablero.
-        movement : movimiento actual.
-        depth : profundidad actual del árbol de búsqueda.
-        alpha : valor alfa.
-        beta : valor beta.
-        maximizing_player : indicador que especifica si el jugador actual está
-                            maximizando o minimizando.
+        piece : pieza (chess.Piece) que se coloca.
+        square : casilla vacía donde se coloca la pieza.
     """
-    # Verificamos si hemos alcanzado la profundidad máxima de búsqueda.
-    if depth == 0:
-        return evaluate_board(board, movement)
+    return PIECE_SQUARE_VALUES[piece.color][piece.piece_type][square]
 
-    # Aplicamos el movimiento actual al tablero utilizado.
-    board.push(chess.Move.from_uci(movement))
 
-    # Obtenemos todos los movimientos legales disponibles para el estado actual del tablero.
-    legal_moves = [str(mov) for mov in board.legal_moves]
+# Casillas ordenadas de mejor a peor para colocar cada pieza según su valor,
+# indexadas como DROP_ORDER[color][tipo de pieza]. Las negras prefieren los
+# valores altos y las blancas los bajos.
+DROP_ORDER = [[None] * 7, [None] * 7]
+for _color in chess.COLORS:
+    for _piece_type in chess.PIECE_TYPES:
+        DROP_ORDER[_color][_piece_type] = sorted(chess.SQUARES, reverse=_color == chess.BLACK,
+                                                 key=PIECE_SQUARE_VALUES[_color][_piece_type].__getitem__)
 
-    # Si el jugador en el nivel actual del árbol es el jugador maximizador,
-    # se realiza una búsqueda maximizadora.
-    if maximizing_player:
-        # Inicializamos value como -Infinite.
-        value = -(math.inf)
 
-        # Para cada movimiento se reliza una llamada recursiva de alphabeta_pruning()
-        # con una profundidad reducida de 1 y se invierte el valor de maximizing_player.
-        for move in legal_moves:
-            value = max(value, alphabeta_pruning(board.copy(), move, depth-1, alpha, beta, False))
+def best_drop_delta(piece, empty):
+    """
+    Calcula el cambio de puntuación al colocar una pieza en la mejor casilla
+    vacía para su color. Se usa en las hojas de la búsqueda, donde una captura
+    va seguida de la colocación de la ficha sin buscarla.
 
-            # Si value es mayor o igual a beta, se realiza el corte beta y se sale del bucle,
-            # ya que se ha encontrado un valor que el jugador minimizador no permitiría.
-            if value >= beta:
-                break
+        piece : pieza (chess.Piece) que se coloca.
+        empty : máscara de casillas vacías.
+    """
+    for square in DROP_ORDER[piece.color][piece.piece_type]:
+        if chess.BB_SQUARES[square] & empty:
+            return PIECE_SQUARE_VALUES[piece.color][piece.piece_type][square]
 
-            alpha = max(alpha, value)
+    return 0
 
-        return value
 
-    # Si no, se realiza una búsqueda minimizadora.
-    else:
-        # Inicializamos value como +Infinite.
-        value = (math.inf)
+def captured_piece_type(board, move):
+    """
+    Devuelve el tipo de pieza que captura un movimiento, incluida la captura al
+    paso, o None si no captura.
 
-        for move in legal_moves:
-            value = min(value, alphabeta_pruning(board.copy(), move, depth-1, alpha, beta, True))
+        board : estado del tablero antes del movimiento.
+        move : movimiento (chess.Move) a evaluar.
+    """
+    if move.from_square == move.to_square:
+        return None
 
-            # Si value es menor o igual que alpha se realiza el corte alpha y se sale del bucle.
-            if value <= alpha:
-                break
+    captured = board.piece_type_at(move.to_square)
+    if not captured and move.to_square == board.ep_square and board.piece_type_at(move.from_square) == chess.PAWN:
+        return chess.PAWN
 
-            beta = min(beta, value)
+    return captured
 
-        return value
+# ============================================================
+#              MOVIMIENTOS ESTÁNDAR DE LAS FICHAS
+# ============================================================
 
+def machine_move(board, movetime=None, nodes=None, max_depth=MAX_DEPTH, workers=None, stats=None):
+    """
+    Realiza el movimiento por parte de la máquina. La búsqueda se hace con
+    profundización iterativa (profundidad 0, 1, ..., max_depth) y se detiene al
+    agotar el tiempo o los nodos; se devuelve el mejor movimiento de la última
+    iteración completa. El tablero queda tal como se recibió.
 
+        board : tablero de ajedrez.
+        movetime : tiempo máximo en milisegundos (None para no limitar).
+        nodes : número máximo de nodos (None para no limitar).
+        max_depth : profundidad máxima de la búsqueda.
+        workers : número de procesos con los que se reparten los movimientos de
+                  la raíz (None o 1 para buscar en serie en este proceso). El
+                  resultado es el mismo con cualquier número de procesos
+                  (ver search_root).
+        stats : SearchStats que se llena durante la búsqueda (None para no
+                medir, salvo que haya un STATS_CALLBACK).
+    """
+    # La búsqueda trabaja sobre una copia en el tablero interno del motor, así
+    # que el tablero recibido no se modifica.
+    board = Position(board)
+    stats = start_stats(stats, "move")
+    key = zobrist_hash(board)
+    SEARCH_LIMITS.start(movetime, nodes)
+
+    # Las posiciones del libro de aperturas y de la caché de análisis se
+    # responden sin buscar.
+    movement = None
+    if OPENING_BOOK is not None:
+        movement = legal_move(board, OPENING_BOOK.choose(key, BOOK_RANDOM))
+    if movement is None and ANALYSIS_CACHE is not None:
+        movement = legal_move(board, ANALYSIS_CACHE.get(key, max_depth, parallel.current_settings()))
+    if movement is not None:
+        finish_stats(stats)
+        return movement.uci()
+
+    # Evaluamos el tablero una sola vez; el resto de la búsqueda actualiza
+    # la puntuación de forma incremental.
+    score = evaluate_position(board)
+    MOVE_ORDERING.new_search(board)
+
+    # Obtenemos todos los movimientos legales disponibles en el tablero, empezando
+    # por el mejor movimiento guardado para esta posición si lo hay.
+    entry = TRANSPOSITION_TABLE.probe(key)
+    hash_move = decode_move(entry[3]) if entry is not None else None
+    legal_moves = MOVE_ORDERING.order_moves(board, list(board.legal_moves), 0, hash_move)
+
+    if not legal_moves:
+        finish_stats(stats)
+        return ""
+
+    # Si el presupuesto se agota antes de completar una iteración, se juega el
+    # primer movimiento según el ordenamiento.
+    movement = legal_moves[0]
+    previous = None
+    completed = True
+
+    for depth in range(max_depth + 1):
+        SEARCH_LIMITS.depth = depth
+
+        # A partir de la segunda iteración se busca con una ventana de aspiración
+        # alrededor de la puntuación anterior, que se amplía si el resultado cae fuera.
+        window = ASPIRATION_WINDOW
+        if previous is None or math.isinf(previous):
+            alpha, beta = -(math.inf), math.inf
+        else:
+            alpha, beta = previous - window, previous + window
+
+        try:
+            while True:
+                if parallel.enabled(workers):
+                    maximum, best_move, results, drop_entry = parallel.search_root_parallel(
+                        board, legal_moves, depth, alpha, beta, score, key, workers)
+                else:
+                    maximum, best_move, results, drop_entry = search_root(
+                        board, legal_moves, depth, alpha, beta, score, key)
+
+                if maximum <= alpha and alpha > -(math.inf):
+                    window *= 4
+                    alpha = previous - window if window < ASPIRATION_LIMIT else -(math.inf)
+                elif maximum >= beta and beta < math.inf:
+                    window *= 4
+                    beta = previous + window if window < ASPIRATION_LIMIT else math.inf
+                else:
+                    break
+
+        except SearchAborted:
+            if stats is not None:
+                stats.iteration(depth, False)
+            completed = False
+            break
+
+        if stats is not None:
+            stats.iteration(depth, True)
+
+        movement = best_move
+        previous = maximum
+
+        # Guardamos el resultado de la raíz (depth + 1 jugadas contando el movimiento
+        # de la máquina) y ordenamos los movimientos según esta iteración, de modo que
+        # la siguiente empiece por la variante principal. Si el mejor movimiento se
+        # buscó aislado y captura, también se guarda la colocación que eligió su
+        # búsqueda, que es la que toma machine_turn.
+        TRANSPOSITION_TABLE.store(key, depth + 1, maximum, EXACT, encode_move(movement))
+        if drop_entry is not None:
+            captured = chess.Piece(captured_piece_type(board, movement), board.turn)
+            TRANSPOSITION_TABLE.store(pocket_hash(captured, move_hash(board, movement, key)), *drop_entry)
+        order = sorted(range(len(legal_moves)), key=lambda index: -results[index])
+        legal_moves = [legal_moves[index] for index in order]
+
+        # Si se encontró un mate no hace falta buscar más profundo.
+        if maximum == math.inf:
+            break
+
+    if completed and ANALYSIS_CACHE is not None:
+        store_analysis(board, key, movement, max_depth)
+
+    finish_stats(stats)
+
+    # Se devuelve el movimiento en notación UCI.
+    return movement.uci()
+
+
+def legal_move(board, code):
+    """
+    Devuelve el movimiento codificado (del libro de aperturas o de la caché
+    de análisis) si es legal en la posición, o None si no lo es o no hay
+    movimiento.
 
-def evaluate_board(board, movement):
+        board : tablero de ajedrez (Position).
+        code : movimiento codificado como en la tabla de transposiciones.
     """
-    Evalúa el estado del tablero en función de los valores asignados a las
-    piezas y las posiciones.
+    move = decode_move(code)
+    if isinstance(move, chess.Move) and move in board.generate_pseudo_legal_moves() and board.is_legal(move):
+        return move
 
-        board : estado del tablero.
-        movement : movimiento actual.
+    return None
+
+
+def legal_drop(board, code):
     """
-    # Creamos un acumulador para la puntuación de la evaluación.
-    value = 0
+    Devuelve la casilla de la colocación codificada (del libro de aperturas o
+    de la caché de análisis) si está vacía, o None si no lo está o no hay
+    colocación.
 
-    # Aplicamos el movimiento actual al tablero.
-    board.push(chess.Move.from_uci(movement))
+        board : tablero de ajedrez tras la captura.
+        code : colocación codificada como en la tabla de transposiciones.
+    """
+    square = decode_move(code)
+    if isinstance(square, int) and not board.piece_type_at(square):
+        return square
 
-    # Recorremos todas las casillas del tablero.
-    for i in range(8):
-        for j in range(8):
-            # Para cada casilla obtenemos la pieza en esa posición.
-            piece = str(board.piece_at(chess.Square((i * 8 + j))))
+    return None
 
-            # Obtenemos el valor asignado a la pieza.
-            # Si no hay pieza en esa casilla, se asigna un valor de 0.
-            piece_val = PIECE_VALUES[piece] if piece != 'None' else 0
 
-            # Obtenemos el valor asignado a la posición de la pieza.
-            pos_val = POSITION_VALUES[piece][i][j] if piece != 'None' else 0
+def store_analysis(board, key, movement, max_depth):
+    """
+    Guarda en la caché de análisis el movimiento elegido por machine_move y,
+    si captura, la colocación que la búsqueda eligió para la ficha robada,
+    con el hash que usa put_piece. Así, cuando machine_move responde desde la
+    caché (y la tabla de transposiciones no tiene la colocación),
+    machine_turn coloca la ficha igual que tras buscar.
+
+        board : tablero de ajedrez (Position).
+        key : hash de Zobrist del tablero.
+        movement : movimiento elegido (chess.Move).
+        max_depth : profundidad máxima de la búsqueda.
+    """
+    settings = parallel.current_settings()
+    ANALYSIS_CACHE.put(key, max_depth, settings, encode_move(movement))
 
-            value += piece_val + pos_val
+    captured = captured_piece_type(board, movement)
+    if captured:
+        drop_key = pocket_hash(chess.Piece(captured, board.turn), move_hash(board, movement, key))
+        entry = TRANSPOSITION_TABLE.probe(drop_key)
+        if entry is not None and isinstance(decode_move(entry[3]), int):
+            ANALYSIS_CACHE.put(drop_key, max_depth, settings, entry[3])
 
-    return value
 
-# ============================================================
-#                 POSICIONAR FICHAS ROBADAS
-# ============================================================
-def put_piece(board, piece):
+def start_stats(stats, kind):
+    """
+    Prepara las estadísticas de una búsqueda y las deja en SEARCH_STATS.
+    Si no se piden pero hay un STATS_CALLBACK, se crean unas nuevas.
+    Devuelve las estadísticas, o None si no se miden.
+
+        stats : SearchStats recibido por machine_move o put_piece, o None.
+        kind : búsqueda que se mide ("move" o "drop").
+    """
+    global SEARCH_STATS
+
+    if stats is None and STATS_CALLBACK is not None:
+        stats = SearchStats()
+    if stats is not None:
+        stats.reset(kind)
+        # La evaluación completa del tablero de la raíz.
+        stats.evaluations += 1
+
+    SEARCH_STATS = stats
+    return stats
+
+
+def finish_stats(stats):
+    """
+    Termina la medición de una búsqueda y entrega las estadísticas a
+    STATS_CALLBACK si lo hay.
+
+        stats : estadísticas devueltas por start_stats (o None).
     """
-    Coloca la ficha robada por parte de la máquina.
+    global SEARCH_STATS
+    SEARCH_STATS = None
+
+    if stats is not None:
+        stats.finish()
+        if STATS_CALLBACK is not None:
+            STATS_CALLBACK(stats)
+
+
+def machine_turn(board, movetime=None, nodes=None, max_depth=MAX_DEPTH, workers=None):
+    """
+    Realiza el turno completo de la máquina: el movimiento y, si captura, la
+    colocación de la ficha robada. La búsqueda de machine_move ya incluye las
+    colocaciones, así que la mejor casilla se toma de la tabla de
+    transposiciones; solo si no está (la entrada se reemplazó) se busca con
+    put_piece en el tiempo que quede. Devuelve el movimiento en notación UCI y
+    la casilla de la colocación (None si no hay captura). El tablero queda tal
+    como se recibió. Al terminar, SEARCH_LIMITS.nodes cuenta los nodos de todo
+    el turno y SEARCH_LIMITS.depth es la profundidad de la búsqueda del
+    movimiento.
+
         board : tablero de ajedrez.
+        movetime : tiempo máximo en milisegundos (None para no limitar).
+        nodes : número máximo de nodos (None para no limitar).
+        max_depth : profundidad máxima de la búsqueda.
+        workers : número de procesos con los que se reparte la búsqueda
+                  (None o 1 para buscar en serie en este proceso).
     """
-    maximum = -(math.inf)
-    movement = ""
+    movement = machine_move(board, movetime, nodes, max_depth, workers)
+    if not movement:
+        return movement, None
+
+    move = chess.Move.from_uci(movement)
+    captured = captured_piece_type(board, move)
+    if not captured:
+        return movement, None
 
-    # Determina las coordenadas de la cuadrícula central 4x4
-    start_row = 2
-    end_row = 6
-    start_col = 2
-    end_col = 6
+    # La colocación que sigue a la captura se guardó con la ficha pendiente en el hash.
+    piece = chess.Piece(captured, board.turn)
+    key = pocket_hash(piece, move_hash(board, move, zobrist_hash(board)))
+    entry = TRANSPOSITION_TABLE.probe(key)
+    square = decode_move(entry[3]) if entry is not None else None
 
-    # Obtiene las casillas vacías en la cuadrícula central
-    # empty_squares = []
-    # for row in range(start_row, end_row + 1):
-    #     for col in range(start_col, end_col + 1):
-    #         square = chess.square(col, row)
-    #         if board.piece_at(square) is None:
-    #             empty_squares.append(square)
+    board.push(move)
 
-    # Obtenemos las casillas que están vacías en el tablero.
-    empty_squares = [square for square in chess.SQUARES if board.piece_at(square) is None]
+    if not isinstance(square, int) or board.piece_at(square):
+        if movetime is not None:
+            movetime = max(0, movetime - SEARCH_LIMITS.elapsed())
+        if nodes is not None:
+            nodes = max(1, nodes - SEARCH_LIMITS.nodes)
+        # Si se pidió detener la búsqueda, no se busca la colocación: con un
+        # solo nodo put_piece devuelve su primera casilla candidata.
+        if SEARCH_LIMITS.stopped:
+            nodes = 1
 
-    # Para cada movimiento legal realiza la poda alpha-beta con una profundidad
-    # máxima de 3 y un indicador False para señalar que es el turno de la máquina.
-    for square in empty_squares:
-        result = alphabeta_pruning_alt(board.copy(), piece, square, 3, -(math.inf), math.inf, False)
+        # put_piece reinicia SEARCH_LIMITS; se le suma lo que buscó machine_move.
+        searched, depth = SEARCH_LIMITS.nodes, SEARCH_LIMITS.depth
+        square = put_piece(board, chess.Piece(captured, not piece.color), movetime, nodes, max_depth, workers)
+        SEARCH_LIMITS.nodes += searched
+        SEARCH_LIMITS.depth = depth
 
-        # Busca el movimiento con el máximo valor.
+    board.pop()
+
+    return movement, square
+
+
+def ponder(board, max_depth=MAX_DEPTH, replies=PONDER_REPLIES):
+    """
+    Piensa durante el turno del rival: busca con machine_move la respuesta
+    de la máquina a los movimientos más probables del rival, empezando por el
+    que predice la tabla de transposiciones, y deja los resultados en la
+    tabla. Si el rival juega uno de ellos, machine_move encuentra la búsqueda
+    ya hecha; si no, parte de la tabla sigue sirviendo. Tras una captura del
+    rival se supone la colocación que guardó la búsqueda anterior, y si no la
+    hay se pasa al siguiente movimiento. Termina al buscar todas las
+    respuestas o al detenerse con SEARCH_LIMITS.stop().
+
+        board : tablero con el turno del rival.
+        max_depth : profundidad máxima de la búsqueda de cada respuesta.
+        replies : número máximo de movimientos del rival a buscar.
+    """
+    board = board.copy()
+    key = zobrist_hash(board)
+    entry = TRANSPOSITION_TABLE.probe(key)
+    hash_move = decode_move(entry[3]) if entry is not None else None
+    MOVE_ORDERING.new_search(board)
+    moves = MOVE_ORDERING.order_moves(board, list(board.legal_moves), 0, hash_move)
+
+    for move in moves[:replies]:
+        captured = captured_piece_type(board, move)
+        if captured:
+            entry = TRANSPOSITION_TABLE.probe(pocket_hash(chess.Piece(captured, board.turn), move_hash(board, move, key)))
+            square = decode_move(entry[3]) if entry is not None else None
+            if not isinstance(square, int):
+                continue
+
+        board.push(move)
+        if captured and not board.piece_at(square):
+            board._set_piece_at(square, captured, not board.turn)
+            machine_move(board, max_depth=max_depth)
+            board._remove_piece_at(square)
+        elif not captured:
+            machine_move(board, max_depth=max_depth)
+        board.pop()
+
+        if SEARCH_LIMITS.stopped:
+            break
+
+
+def search_root(board, legal_moves, depth, alpha, beta, score, key):
+    """
+    Busca todos los movimientos de la raíz con búsqueda de variante principal.
+    El primero se busca con la ventana de aspiración y las tablas de la
+    búsqueda; el resto, con search_isolated y la misma cota para todos: la
+    puntuación del primero. Así la puntuación de cada movimiento no depende
+    del orden en que se buscan ni del proceso que los busca, y
+    parallel.search_root_parallel da el mismo resultado. Devuelve la mejor
+    puntuación, el mejor movimiento, la puntuación (o cota) de cada movimiento
+    y, si el mejor movimiento se buscó aislado, su entrada de la colocación
+    (ver search_isolated).
+
+        board : tablero de ajedrez.
+        legal_moves : movimientos legales ordenados.
+        depth : profundidad de la iteración.
+        alpha : valor alfa de la ventana de aspiración.
+        beta : valor beta de la ventana de aspiración.
+        score : puntuación del tablero.
+        key : hash de Zobrist del tablero.
+    """
+    maximum = alphabeta_pruning(board, legal_moves[0], depth, alpha, beta, False, score, key)
+    best_move = legal_moves[0]
+    drop_entry = None
+    results = [maximum]
+    bound = max(alpha, maximum)
+
+    for move in legal_moves[1:]:
+        # Si el movimiento supera la ventana de aspiración, la iteración se repite.
+        if maximum >= beta:
+            break
+
+        result, entry = search_isolated(board, move, depth, bound, beta, score, key)
+        results.append(result)
+
+        # Se busca que el movimiento tenga el máximo valor; en caso de empate,
+        # el primero según el ordenamiento.
         if result > maximum:
-            movement = square
-            maximum = result
+            best_move, maximum, drop_entry = move, result, entry
 
-    return movement
+    # Los movimientos que no llegaron a buscarse quedan al final del ordenamiento.
+    results += [-(math.inf)] * (len(legal_moves) - len(results))
+
+    return maximum, best_move, results, drop_entry
 
 
-def alphabeta_pruning_alt(board, piece, square, depth, alpha, beta, maximizing_player):
+def search_isolated(board, movement, depth, bound, beta, score, key):
     """
-    Implementa la poda alpha-beta.
+    Busca un movimiento (o una colocación) de la raíz con ISOLATED_TABLE y
+    ISOLATED_ORDERING vacíos, en lugar de las tablas de la búsqueda. Primero
+    se comprueba con una ventana nula si supera la cota y, solo si la supera,
+    se busca con la ventana (cota, beta). El resultado depende solo de la
+    posición, el movimiento y la ventana, de modo que es el mismo en este
+    proceso y en los procesos trabajadores. Devuelve la puntuación (o cota) y,
+    si el movimiento captura, la entrada de la tabla aislada con la
+    colocación que sigue (o None).
+
+        board : tablero de ajedrez.
+        movement : movimiento de la raíz (chess.Move, con drop si es una colocación).
+        depth : profundidad de la iteración.
+        bound : cota que debe superar el movimiento.
+        beta : valor beta de la ventana.
+        score : puntuación del tablero.
+        key : hash de Zobrist del tablero.
+    """
+    global TRANSPOSITION_TABLE, MOVE_ORDERING
+
+    table, ordering = TRANSPOSITION_TABLE, MOVE_ORDERING
+    ISOLATED_TABLE.new_generation()
+    ISOLATED_ORDERING.clear()
+    ISOLATED_ORDERING.root_ply = board.ply()
+    TRANSPOSITION_TABLE, MOVE_ORDERING = ISOLATED_TABLE, ISOLATED_ORDERING
+
+    try:
+        # Con la ventana nula (bound, bound + 1) solo se comprueba si el movimiento
+        # supera la cota; las puntuaciones son enteras, así que basta con un punto.
+        if bound == -(math.inf):
+            result = alphabeta_pruning(board, movement, depth, bound, beta, False, score, key)
+        else:
+            result = alphabeta_pruning(board, movement, depth, bound, bound + 1, False, score, key)
+            if bound < result < beta:
+                result = alphabeta_pruning(board, movement, depth, bound, beta, False, score, key)
+
+        entry = None
+        captured = not movement.drop and captured_piece_type(board, movement)
+        if captured:
+            entry = ISOLATED_TABLE.probe(pocket_hash(chess.Piece(captured, board.turn),
+                                                     move_hash(board, movement, key)))
+
+    finally:
+        TRANSPOSITION_TABLE, MOVE_ORDERING = table, ordering
+
+    return result, entry
+
+
+def alphabeta_pruning(board, movement, depth, alpha, beta, maximizing_player, score, key):
+    """
+    Implementa la poda alpha-beta. El movimiento se aplica con push() y se
+    deshace con pop() antes de devolver el valor, de modo que todo el árbol se
+    recorre sobre un único tablero sin copias.
 
         board : estado actual del tablero.
-        square : casilla actual.
+        movement : movimiento actual (chess.Move).
         depth : profundidad actual del árbol de búsqueda.
         alpha : valor alfa.
         beta : valor beta.
         maximizing_player : indicador que especifica si el jugador actual está
                             maximizando o minimizando.
+        score : puntuación del tablero antes de aplicar el movimiento actual.
+        key : hash de Zobrist del tablero antes de aplicar el movimiento actual.
     """
-    # Verificamos si hemos alcanzado la profundidad máxima de búsqueda.
-    if depth == 0:
-        return evaluate_board_alt(board, square, piece)
+    SEARCH_LIMITS.check()
+
+    stats = SEARCH_STATS
+    if stats is not None:
+        stats.nodes_by_depth[depth] += 1
+
+    # Colocación de una ficha robada: la pieza es del jugador que acaba de
+    # mover (la ficha cambia de color al ser capturada) y el turno no cambia.
+    if movement.drop:
+        piece = chess.Piece(movement.drop, not board.turn)
+        score += drop_delta(piece, movement.to_square)
 
-    # TODO: Colocar la ficha.board.push(chess.Move.from_uci(movement))
-    # Se convierte la pieza a formato chess.
-    piece = chess.Piece(piece.piece_type, not piece.color)
-    # Se coloca la pieza en la casilla seleccionada.
-    board.set_piece_at(square, piece)
+        if depth == 0:
+            if stats is not None:
+                stats.leaves += 1
+                stats.evaluations += 1
+            return score
 
-    # Obtenemos las casillas que están vacías en el tablero.
-    empty_squares = [square for square in chess.SQUARES if board.piece_at(square) is None]
+        key = drop_hash(piece, movement.to_square, pocket_hash(piece, key))
+
+    else:
+        # Actualizamos la puntuación con las piezas que cambian en el movimiento.
+        captured = captured_piece_type(board, movement)
+        score += move_delta(board, movement)
+
+        # Verificamos si hemos alcanzado la profundidad máxima de búsqueda.
+        # La evaluación equivale a la de evaluate_position, pero en tiempo constante.
+        # Si el movimiento captura, la ficha se coloca en su mejor casilla.
+        if depth == 0:
+            if captured:
+                empty = ~(board.occupied & ~chess.BB_SQUARES[movement.from_square]) & chess.BB_ALL
+                if movement.to_square == board.ep_square and captured == chess.PAWN:
+                    empty |= chess.BB_SQUARES[movement.to_square ^ 8]
+                score += best_drop_delta(chess.Piece(captured, board.turn), empty)
+            if stats is not None:
+                stats.leaves += 1
+                stats.evaluations += 1
+            return score
+
+        key = move_hash(board, movement, key)
+
+        # Tras una captura, el jugador que captura coloca la ficha antes de que
+        # responda el rival.
+        if captured:
+            return alphabeta_pruning_drops(board, movement, chess.Piece(captured, board.turn), depth,
+                                           alpha, beta, not maximizing_player, score, key)
+
+    # Si la posición ya se buscó con al menos esta profundidad, usamos el
+    # resultado guardado cuando es exacto o basta para producir un corte.
+    entry = TRANSPOSITION_TABLE.probe(key)
+    if stats is not None:
+        stats.tt_probes += 1
+        stats.tt_hits += entry is not None
+    if entry is not None and entry[0] >= depth:
+        value, flag = entry[1], entry[2]
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value
+
+    alpha_orig, beta_orig = alpha, beta
+    best_move = None
+
+    # Aplicamos el movimiento actual (o colocamos la ficha) al tablero utilizado.
+    push_movement(board, movement)
+
+    in_check = (NULL_MOVE_PRUNING or LATE_MOVE_REDUCTIONS) and board.is_check()
+
+    # Poda de movimiento nulo: el jugador cede el turno y se busca con menos
+    # profundidad. Si aun así se supera la ventana, se corta el nodo. No se usa
+    # en jaque, tras otro movimiento nulo ni cuando solo quedan rey y peones,
+    # donde ceder el turno podría ser mejor que cualquier movimiento (zugzwang).
+    if (NULL_MOVE_PRUNING and depth >= NULL_MOVE_MIN_DEPTH and not in_check
+            and movement != NULL_MOVE
+            and board.occupied_co[board.turn] & ~(board.pawns | board.kings)):
+        null_depth = max(0, depth - 1 - NULL_MOVE_REDUCTION)
+
+        if maximizing_player and beta < math.inf:
+            if alphabeta_pruning(board, NULL_MOVE, null_depth, beta - 1, beta, False, score, key) >= beta:
+                pop_movement(board, movement)
+                TRANSPOSITION_TABLE.store(key, depth, beta, LOWER, 0)
+                if stats is not None:
+                    stats.null_cutoffs += 1
+                return beta
+
+        elif not maximizing_player and alpha > -(math.inf):
+            if alphabeta_pruning(board, NULL_MOVE, null_depth, alpha, alpha + 1, True, score, key) <= alpha:
+                pop_movement(board, movement)
+                TRANSPOSITION_TABLE.store(key, depth, alpha, UPPER, 0)
+                if stats is not None:
+                    stats.null_cutoffs += 1
+                return alpha
+
+    # En la frontera todos los hijos son hojas: se evalúan juntos y no hace
+    # falta ordenarlos. El valor es el del mejor hijo, sin cortes intermedios.
+    if depth == 1 and BATCH_EVALUATION and evaluation.available():
+        value, best_move = frontier_value(board, maximizing_player, score)
+        if best_move is not None and (value >= beta if maximizing_player else value <= alpha):
+            MOVE_ORDERING.cutoff(board, best_move, MOVE_ORDERING.ply(board), depth)
+
+        pop_movement(board, movement)
+        TRANSPOSITION_TABLE.store(key, depth, value, bound_type(value, alpha_orig, beta_orig), encode_move(best_move))
+
+        return value
+
+    # Obtenemos los movimientos pseudo-legales del estado actual del tablero,
+    # ordenados para que los cortes se produzcan lo antes posible. La legalidad
+    # se comprueba solo en los movimientos que se llegan a buscar, ya que tras
+    # un corte el resto no se usa. En jaque, chess.Board.legal_moves genera
+    # primero las jugadas de rey y luego las que tapan o capturan, así que los
+    # empates del ordenamiento se resuelven en otro orden que recorriendo los
+    # pseudo-legales; de ahí que el número de nodos pueda variar en unos pocos.
+    ply = MOVE_ORDERING.ply(board)
+    hash_move = decode_move(entry[3]) if entry is not None else None
+    moves = MOVE_ORDERING.order_moves(board, list(board.generate_pseudo_legal_moves()), ply, hash_move)
+    index = 0
 
     # Si el jugador en el nivel actual del árbol es el jugador maximizador,
     # se realiza una búsqueda maximizadora.
@@ -197,64 +789,418 @@ def alphabeta_pruning_alt(board, piece, square, depth, alpha, beta, maximizing_p
 
         # Para cada movimiento se reliza una llamada recursiva de alphabeta_pruning()
         # con una profundidad reducida de 1 y se invierte el valor de maximizing_player.
-        for square in empty_squares:
-            value = max(value, alphabeta_pruning_alt(board.copy(), piece, square, depth-1, -(math.inf), math.inf, False))
+        for move in moves:
+            if not board.is_legal(move):
+                continue
+
+            # Búsqueda de variante principal: el primer movimiento con la ventana
+            # completa y el resto con una ventana nula, repitiendo la búsqueda
+            # solo si el movimiento resulta mejor que alpha. Los movimientos
+            # tardíos se prueban primero con la profundidad reducida.
+            if index == 0 or alpha == -(math.inf):
+                result = alphabeta_pruning(board, move, depth-1, alpha, beta, False, score, key)
+            else:
+                reduction = late_move_reduction(board, move, index, depth, in_check)
+                result = alphabeta_pruning(board, move, depth-1-reduction, alpha, alpha + 1, False, score, key)
+                if reduction and result > alpha:
+                    result = alphabeta_pruning(board, move, depth-1, alpha, alpha + 1, False, score, key)
+                if alpha < result < beta:
+                    result = alphabeta_pruning(board, move, depth-1, alpha, beta, False, score, key)
+            index += 1
+
+            if result > value:
+                value, best_move = result, move
 
             # Si value es mayor o igual a beta, se realiza el corte beta y se sale del bucle,
             # ya que se ha encontrado un valor que el jugador minimizador no permitiría.
             if value >= beta:
+                MOVE_ORDERING.cutoff(board, move, ply, depth)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    stats.first_cutoffs += index == 1
                 break
 
             alpha = max(alpha, value)
 
-        return value
-
     # Si no, se realiza una búsqueda minimizadora.
     else:
         # Inicializamos value como +Infinite.
         value = (math.inf)
 
-        for square in empty_squares:
-            value = max(value, alphabeta_pruning_alt(board.copy(), piece, square, depth-1, -(math.inf), math.inf, True))
+        for move in moves:
+            if not board.is_legal(move):
+                continue
+
+            # Igual que en el caso maximizador, con la ventana nula junto a beta.
+            if index == 0 or beta == math.inf:
+                result = alphabeta_pruning(board, move, depth-1, alpha, beta, True, score, key)
+            else:
+                reduction = late_move_reduction(board, move, index, depth, in_check)
+                result = alphabeta_pruning(board, move, depth-1-reduction, beta - 1, beta, True, score, key)
+                if reduction and result < beta:
+                    result = alphabeta_pruning(board, move, depth-1, beta - 1, beta, True, score, key)
+                if alpha < result < beta:
+                    result = alphabeta_pruning(board, move, depth-1, alpha, beta, True, score, key)
+            index += 1
+
+            if result < value:
+                value, best_move = result, move
 
             # Si value es menor o igual que alpha se realiza el corte alpha y se sale del bucle.
             if value <= alpha:
+                MOVE_ORDERING.cutoff(board, move, ply, depth)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    stats.first_cutoffs += index == 1
                 break
 
             beta = min(beta, value)
 
-        return value
+    # Deshacemos el movimiento para dejar el tablero como estaba.
+    pop_movement(board, movement)
+
+    TRANSPOSITION_TABLE.store(key, depth, value, bound_type(value, alpha_orig, beta_orig), encode_move(best_move))
+
+    return value
+
 
+def frontier_value(board, maximizing_player, score):
+    """
+    Evalúa en bloque todos los hijos de un nodo de la frontera (a un nivel de
+    las hojas) con evaluation.leaf_scores. Devuelve el valor del mejor hijo y
+    su movimiento (None si no hay movimientos legales).
+
+        board : estado del tablero del nodo.
+        maximizing_player : indica si el jugador que mueve maximiza.
+        score : puntuación del tablero.
+    """
+    legal_moves = list(board.legal_moves)
+    SEARCH_LIMITS.count(len(legal_moves))
+
+    if SEARCH_STATS is not None:
+        SEARCH_STATS.leaves += len(legal_moves)
+        SEARCH_STATS.evaluations += len(legal_moves)
+
+    if not legal_moves:
+        return (-(math.inf) if maximizing_player else math.inf), None
+
+    scores = evaluation.leaf_scores(board, legal_moves, score)
+    index = int(scores.argmax() if maximizing_player else scores.argmin())
 
-def evaluate_board_alt(board, square, piece):
+    return int(scores[index]), legal_moves[index]
+
+
+def alphabeta_pruning_drops(board, movement, piece, depth, alpha, beta, maximizing_player, score, key):
+    """
+    Busca el nodo que sigue a una captura: el jugador que capturó coloca la
+    ficha en una casilla vacía y después responde el rival. La colocación no
+    gasta profundidad, de modo que captura y colocación cuentan como una jugada.
+    Cada casilla se busca con alphabeta_pruning como un movimiento con drop.
+
+        board : estado del tablero antes de la captura.
+        movement : captura (chess.Move) que se aplica.
+        piece : ficha (chess.Piece) que se coloca, con el color del jugador
+                que captura.
+        depth : profundidad actual del árbol de búsqueda.
+        alpha : valor alfa.
+        beta : valor beta.
+        maximizing_player : indica si el jugador que coloca la ficha maximiza.
+        score : puntuación del tablero tras la captura.
+        key : hash de Zobrist del tablero tras la captura.
     """
-    Evalúa el estado del tablero en función de los valores asignados a las
-    piezas y las posiciones.
+    # El hash incluye la ficha pendiente de colocar, que distingue este nodo
+    # de la misma posición una vez colocada la ficha.
+    key = pocket_hash(piece, key)
+    entry = TRANSPOSITION_TABLE.probe(key)
+    stats = SEARCH_STATS
+    if stats is not None:
+        stats.tt_probes += 1
+        stats.tt_hits += entry is not None
+    if entry is not None and entry[0] >= depth:
+        value, flag = entry[1], entry[2]
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value
+
+    alpha_orig, beta_orig = alpha, beta
+    best_square = None
+
+    board.push(movement)
+
+    # Obtenemos las casillas candidatas, empezando por la mejor guardada en la tabla.
+    # La colocación que sigue a un movimiento de la raíz es la que se juega, así
+    # que se buscan más casillas que en las colocaciones más profundas. Un
+    # límite None prueba todas las casillas vacías.
+    limit = DROP_CANDIDATES if MOVE_ORDERING.ply(board) <= 1 else DROP_SEARCH_CANDIDATES
+    squares = drop_squares(board, piece, depth, maximizing_player, limit)
+    hash_square = decode_move(entry[3]) if entry is not None else None
+    if hash_square in squares:
+        squares.remove(hash_square)
+        squares.insert(0, hash_square)
+
+    value = -(math.inf) if maximizing_player else math.inf
+
+    for index, square in enumerate(squares):
+        result = alphabeta_pruning(board, chess.Move(square, square, drop=piece.piece_type), depth,
+                                   alpha, beta, not maximizing_player, score, key)
+
+        if maximizing_player:
+            if result > value:
+                value, best_square = result, square
+            if value >= beta:
+                break
+            alpha = max(alpha, value)
+
+        else:
+            if result < value:
+                value, best_square = result, square
+            if value <= alpha:
+                break
+            beta = min(beta, value)
+
+    # Si el bucle recorre todas las casillas sin salir antes, no hubo corte.
+    else:
+        index = None
+
+    if stats is not None and index is not None:
+        stats.cutoffs += 1
+        stats.first_cutoffs += index == 0
+
+    board.pop()
+
+    TRANSPOSITION_TABLE.store(key, depth, value, bound_type(value, alpha_orig, beta_orig),
+                              encode_drop(best_square) if best_square is not None else 0)
+
+    return value
+
+
+def push_movement(board, movement):
+    """
+    Aplica un movimiento al tablero. Las colocaciones de fichas ponen la pieza
+    con el color del jugador que acaba de mover y no cambian el turno. Se usa
+    _set_piece_at() porque set_piece_at() vacía la pila de movimientos y no
+    se podría deshacer con pop() la captura que precede a la colocación.
 
         board : estado del tablero.
-        movement : movimiento actual.
+        movement : movimiento (chess.Move) o colocación (con drop).
     """
-    # Creamos un acumulador para la puntuación de la evaluación.
-    value = 0
+    if movement.drop:
+        board._set_piece_at(movement.to_square, movement.drop, not board.turn)
+    else:
+        board.push(movement)
+
+
+def pop_movement(board, movement):
+    """
+    Deshace un movimiento aplicado con push_movement.
+
+        board : estado del tablero.
+        movement : movimiento (chess.Move) o colocación (con drop).
+    """
+    if movement.drop:
+        board._remove_piece_at(movement.to_square)
+    else:
+        board.pop()
+
+
+def late_move_reduction(board, move, index, depth, in_check):
+    """
+    Devuelve cuántos niveles se reduce la búsqueda de un movimiento: solo se
+    reducen los movimientos tranquilos (sin captura ni promoción) que aparecen
+    tarde en el ordenamiento, y nunca estando en jaque.
+
+        board : estado del tablero antes del movimiento.
+        move : movimiento a buscar.
+        index : posición del movimiento en el ordenamiento.
+        depth : profundidad restante del nodo.
+        in_check : indica si el jugador que mueve está en jaque.
+    """
+    if (not LATE_MOVE_REDUCTIONS or index < LMR_MIN_INDEX or depth < LMR_MIN_DEPTH or in_check
+            or move.promotion or board.piece_type_at(move.to_square)):
+        return 0
 
-    # Se convierte la pieza a formato chess.
-    piece = chess.Piece(piece.piece_type, not piece.color)
-    # Se coloca la pieza en la casilla seleccionada.
-    board.set_piece_at(square, piece)
+    return min(LMR_REDUCTION, depth - 1)
 
-    # Recorremos todas las casillas del tablero.
-    for i in range(8):
-        for j in range(8):
-            # Para cada casilla obtenemos la pieza en esa posición.
-            piece = str(board.piece_at(chess.Square((i * 8 + j))))
 
-            # Obtenemos el valor asignado a la pieza.
-            # Si no hay pieza en esa casilla, se asigna un valor de 0.
-            piece_val = PIECE_VALUES[piece] if piece != 'None' else 0
+def bound_type(value, alpha, beta):
+    """
+    Indica qué tipo de cota es el valor de un nodo según la ventana con la que
+    se buscó.
 
-            # Obtenemos el valor asignado a la posición de la pieza.
-            pos_val = POSITION_VALUES[piece][i][j] if piece != 'None' else 0
+        value : valor obtenido en el nodo.
+        alpha : valor alfa con el que se llamó al nodo.
+        beta : valor beta con el que se llamó al nodo.
+    """
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
 
-            value += piece_val + pos_val
+# ============================================================
+#                 POSICIONAR FICHAS ROBADAS
+# ============================================================
+def put_piece(board, piece, movetime=None, nodes=None, max_depth=MAX_DEPTH, workers=None, stats=None):
+    """
+    Coloca la ficha robada por parte de la máquina. La colocación es la raíz
+    de la misma búsqueda que usa machine_move: tras cada casilla responde el
+    rival con sus movimientos (y sus propias colocaciones si captura). Igual
+    que machine_move, busca con profundización iterativa dentro del
+    presupuesto dado y devuelve la mejor casilla de la última iteración
+    completa. Entre casillas con la misma puntuación se elige la primera
+    candidata, de modo que el resultado es el mismo en serie y en paralelo.
+
+        board : tablero de ajedrez tras la captura.
+        piece : ficha robada (chess.Piece), con el color que tenía antes de
+                ser capturada.
+        movetime : tiempo máximo en milisegundos (None para no limitar).
+        nodes : número máximo de nodos (None para no limitar).
+        max_depth : profundidad máxima de la búsqueda.
+        workers : número de procesos con los que se reparten las casillas
+                  (None o 1 para buscar en serie en este proceso). Igual que
+                  en machine_move, el resultado es el mismo con cualquier
+                  número de procesos.
+        stats : SearchStats que se llena durante la búsqueda (None para no
+                medir, salvo que haya un STATS_CALLBACK).
+    """
+    # Igual que en machine_move, la búsqueda trabaja sobre una copia.
+    board = Position(board)
+    stats = start_stats(stats, "drop")
+    placed = chess.Piece(piece.piece_type, not piece.color)
+    key = zobrist_hash(board, placed)
+    SEARCH_LIMITS.start(movetime, nodes)
+
+    # Las colocaciones del libro de aperturas y de la caché de análisis se
+    # responden sin buscar.
+    square = None
+    if OPENING_BOOK is not None:
+        square = legal_drop(board, OPENING_BOOK.choose(key, BOOK_RANDOM))
+    if square is None and ANALYSIS_CACHE is not None:
+        square = legal_drop(board, ANALYSIS_CACHE.get(key, max_depth, parallel.current_settings()))
+    if square is not None:
+        finish_stats(stats)
+        return square
+
+    # Evaluamos el tablero una sola vez; cada colocación suma su propio valor.
+    score = evaluate_position(board)
+    MOVE_ORDERING.new_search(board)
+
+    # Obtenemos las casillas candidatas para la ficha que coloca la máquina,
+    # empezando por las más prometedoras.
+    candidates = drop_squares(board, placed, max_depth, True, DROP_CANDIDATES)
+
+    if not candidates:
+        finish_stats(stats)
+        return ""
+
+    movement = candidates[0]
+    empty_squares = candidates
+    completed = True
+
+    for depth in range(max_depth + 1):
+        SEARCH_LIMITS.depth = depth
+
+        try:
+            if parallel.enabled(workers):
+                results = parallel.search_drops_parallel(board, piece, empty_squares, depth, score, key, workers)
+            else:
+                results = search_drops(board, piece, empty_squares, depth, score, key)
+
+        except SearchAborted:
+            if stats is not None:
+                stats.iteration(depth, False)
+            completed = False
+            break
+
+        if stats is not None:
+            stats.iteration(depth, True)
+
+        # Busca la casilla con el máximo valor; en caso de empate, la primera candidata.
+        maximum = max(results)
+        movement = min((square for square, result in zip(empty_squares, results) if result == maximum),
+                       key=candidates.index)
+
+        # La siguiente iteración empieza por las mejores casillas de esta.
+        order = sorted(range(len(empty_squares)), key=lambda index: -results[index])
+        empty_squares = [empty_squares[index] for index in order]
+
+        # Si se encontró un mate no hace falta buscar más profundo.
+        if maximum == math.inf:
+            break
+
+    if completed and ANALYSIS_CACHE is not None:
+        ANALYSIS_CACHE.put(key, max_depth, parallel.current_settings(), encode_drop(movement))
+
+    finish_stats(stats)
+
+    return movement
+
+
+def search_drops(board, piece, squares, depth, score, key):
+    """
+    Busca todas las casillas de la raíz de la colocación y devuelve la
+    puntuación de cada una. La primera casilla se busca con las tablas de la
+    búsqueda y el resto con search_isolated, usando como cota la puntuación de
+    la primera (menos uno, ya que las puntuaciones son enteras). Así las
+    casillas que la igualan o superan tienen su valor exacto, las demás solo
+    una cota superior, y el resultado es el mismo que con
+    parallel.search_drops_parallel.
+
+        board : tablero de ajedrez tras la captura.
+        piece : ficha robada (chess.Piece), con el color que tenía antes de
+                ser capturada.
+        squares : casillas candidatas ordenadas.
+        depth : profundidad de la iteración.
+        score : puntuación del tablero.
+        key : hash de Zobrist del tablero, con la ficha pendiente de colocar.
+    """
+    # Para cada casilla realiza la poda alpha-beta con la profundidad de la
+    # iteración y un indicador False para señalar que después mueve el rival.
+    drop = chess.Move(squares[0], squares[0], drop=piece.piece_type)
+    results = [alphabeta_pruning(board, drop, depth, -(math.inf), math.inf, False, score, key)]
+
+    # Si la primera casilla da mate, ninguna otra puede superarla.
+    if results[0] == math.inf:
+        return results + [-(math.inf)] * (len(squares) - 1)
+
+    for square in squares[1:]:
+        drop = chess.Move(square, square, drop=piece.piece_type)
+        results.append(search_isolated(board, drop, depth, results[0] - 1, math.inf, score, key)[0])
+
+    return results
+
+
+def drop_squares(board, piece, depth, maximizing_player, limit):
+    """
+    Devuelve las casillas donde se prueba a colocar una pieza, de la más a la
+    menos prometedora. Si la colocación se sigue buscando (depth > 0) se usan
+    las casillas candidatas según los ataques de la pieza y de ambos bandos.
+    En las hojas la puntuación es exactamente el valor de la tabla, así que se
+    toman las mejores casillas según ese valor, que ya incluyen la mejor.
+
+        board : estado del tablero.
+        piece : pieza (chess.Piece) que se va a colocar.
+        depth : profundidad que se buscará tras colocar la pieza.
+        maximizing_player : indica si quien coloca maximiza.
+        limit : número máximo de casillas (None para no limitar).
+    """
+    if depth > 0 and (limit is not None or DROP_MARGIN is not None):
+        values = PIECE_SQUARE_VALUES[piece.color][piece.piece_type]
+        return drop_candidates(board, piece, values, limit, DROP_MARGIN)
+
+    return empty_squares_by_value(board, piece, maximizing_player)[:limit]
+
+
+def empty_squares_by_value(board, piece, maximizing_player):
+    """
+    Devuelve las casillas vacías ordenadas según el valor que tendría en ellas
+    la pieza, de mayor a menor si quien coloca maximiza y de menor a mayor si
+    minimiza.
+
+        board : estado del tablero.
+        piece : pieza (chess.Piece) que se va a colocar.
+        maximizing_player : indica si quien coloca maximiza.
+    """
+    table = PIECE_SQUARE_VALUES[piece.color][piece.piece_type]
+    empty = chess.scan_forward(~board.occupied & chess.BB_ALL)
 
-    return value
\ No newline at end of file
+    return sorted(empty, key=table.__getitem__, reverse=maximizing_player)
@@ -0,0 +1,134 @@
+import math
+import queue
+import threading
+import time
+
+import AI
+
+# ============================================================
+#                 TURNO DE LA MÁQUINA EN SEGUNDO PLANO
+# ============================================================
+
+# Cada cuánto (en segundos) se repite la orden de detenerse mientras se espera
+# a que termine el hilo, por si la búsqueda aún no había empezado (start()
+# reinicia la señal de SearchLimits).
+CANCEL_INTERVAL = 0.002
+
+
+class BackgroundSearch:
+    """
+    Ejecuta el turno de la máquina (AI.machine_turn) en un hilo aparte, para
+    que la ventana siga dibujándose y respondiendo mientras la IA piensa. El
+    resultado se deja en una cola que el bucle principal consulta en cada
+    cuadro con result(). Durante el turno del rival el mismo hilo puede
+    pensar con ponder(); como ambas búsquedas usan las tablas globales de AI,
+    nunca corren a la vez.
+    """
+
+    def __init__(self):
+        self.results = queue.Queue()
+        self.thread = None
+        self.pending = False
+        self.generation = 0
+
+
+    def start(self, board, movetime=None, nodes=None, max_depth=AI.MAX_DEPTH, workers=None):
+        """
+        Empieza a buscar el turno de la máquina. La búsqueda trabaja sobre una
+        copia, así que el tablero se puede seguir dibujando mientras tanto.
+
+            board : tablero de ajedrez.
+            movetime : tiempo máximo en milisegundos (None para no limitar).
+            nodes : número máximo de nodos (None para no limitar).
+            max_depth : profundidad máxima de la búsqueda.
+            workers : número de procesos con los que se reparte la búsqueda.
+        """
+        # Si se estaba pensando durante el turno del rival, se detiene primero.
+        self.cancel()
+
+        self.pending = True
+        self.generation += 1
+        self.thread = threading.Thread(target=self._run,
+                                       args=(self.generation, board.copy(), movetime, nodes, max_depth, workers),
+                                       daemon=True)
+        self.thread.start()
+
+
+    def ponder(self, board, max_depth=AI.MAX_DEPTH):
+        """
+        Empieza a pensar durante el turno del rival (AI.ponder). No produce
+        resultado: llena la tabla de transposiciones hasta que termina o hasta
+        que start() o cancel() la detienen.
+
+            board : tablero con el turno del rival.
+            max_depth : profundidad máxima de la búsqueda de cada respuesta.
+        """
+        self.cancel()
+        self.thread = threading.Thread(target=AI.ponder, args=(board.copy(), max_depth), daemon=True)
+        self.thread.start()
+
+
+    def _run(self, generation, board, movetime, nodes, max_depth, workers):
+        """
+        Cuerpo del hilo: busca el turno y deja en la cola el resultado, o la
+        excepción si la búsqueda falló, para relanzarla en el hilo principal.
+        El resultado va con la generación de la búsqueda, de modo que el de
+        una búsqueda cancelada no se confunde con el de la siguiente.
+        """
+        try:
+            result = AI.machine_turn(board, movetime, nodes, max_depth, workers)
+        except Exception as error:
+            result = error
+
+        self.results.put((generation, result))
+
+
+    def busy(self):
+        """
+        Indica si hay un turno en curso o uno terminado que aún no se recogió.
+        """
+        return self.pending
+
+
+    def result(self):
+        """
+        Devuelve el resultado de machine_turn (movimiento y casilla) si la
+        búsqueda terminó, o None si sigue en curso o no hay ninguna.
+        """
+        while True:
+            try:
+                generation, result = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if generation == self.generation and self.pending:
+                break
+
+        self.pending = False
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+    def progress(self):
+        """
+        Devuelve la profundidad de la iteración en curso y los nodos buscados.
+        """
+        return AI.SEARCH_LIMITS.depth, AI.SEARCH_LIMITS.nodes
+
+
+    def cancel(self, timeout=None):
+        """
+        Detiene la búsqueda en curso y espera a que termine el hilo. El
+        resultado de una búsqueda cancelada se descarta.
+
+            timeout : tiempo máximo de espera en segundos (None para esperar
+                      sin límite).
+        """
+        deadline = time.perf_counter() + timeout if timeout is not None else math.inf
+
+        while self.thread is not None and self.thread.is_alive() and time.perf_counter() < deadline:
+            AI.SEARCH_LIMITS.stop()
+            self.thread.join(CANCEL_INTERVAL)
+
+        self.pending = False
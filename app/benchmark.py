@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import chess
+
+import AI
+import evaluation
+
+from bitboard import Position
+
+# ============================================================
+#                 BANCO DE PRUEBAS DEL MOTOR
+# ============================================================
+
+# Archivo con las posiciones del banco de pruebas (junto a este módulo).
+POSITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_positions.txt")
+
+# Profundidad máxima de las búsquedas medidas.
+BENCHMARK_DEPTH = 3
+
+# Ejecuciones de calentamiento (no se miden) y ejecuciones medidas de cada
+# prueba; de las medidas se toma la más rápida.
+WARMUP = 1
+REPEAT = 3
+
+# Veces que se evalúa cada posición en la prueba de evaluaciones por segundo.
+EVALUATIONS = 2000
+
+# Cuadros dibujados en la prueba de la interfaz.
+FRAMES = 200
+
+# Empeoramiento relativo a partir del cual una métrica se marca como regresión.
+TOLERANCE = 0.15
+
+# Métricas del resumen y si es mejor que sean mayores (True) o menores (False).
+METRICS = {
+    "nodes_per_second": True,
+    "placement_ms": False,
+    "evaluations_per_second": True,
+    "batch_evaluations_per_second": True,
+    "render_full_ms": False,
+    "render_idle_ms": False,
+}
+
+
+def load_positions(path=POSITIONS_FILE):
+    """
+    Lee las posiciones del banco de pruebas. Devuelve una lista de
+    diccionarios con la categoría, el FEN y, en las colocaciones, la ficha
+    robada.
+
+        path : archivo de posiciones (categoría ; FEN ; ficha por línea).
+    """
+    positions = []
+    with open(path) as positions_file:
+        for line in positions_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in line.split(";")]
+            positions.append({"category": fields[0], "fen": fields[1],
+                              "piece": fields[2] if len(fields) > 2 else None})
+
+    return positions
+
+
+def reset_search():
+    """
+    Vacía las tablas de la búsqueda para que cada ejecución empiece en frío.
+    """
+    AI.TRANSPOSITION_TABLE.clear()
+    AI.MOVE_ORDERING.clear()
+
+
+def measure(function, warmup=WARMUP, repeat=REPEAT):
+    """
+    Ejecuta una prueba warmup veces sin medirla y repeat veces midiéndola.
+    Devuelve el menor tiempo en milisegundos y el último resultado.
+
+        function : prueba (sin argumentos).
+        warmup : ejecuciones de calentamiento.
+        repeat : ejecuciones medidas.
+    """
+    for _ in range(warmup):
+        function()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return min(times), result
+
+
+def bench_search(position, depth, warmup, repeat):
+    """
+    Mide machine_move a cada profundidad (tiempo hasta la profundidad) con
+    las tablas vacías. Devuelve una lista con la profundidad, los
+    milisegundos, los nodos y el movimiento elegido.
+
+        position : posición del banco de pruebas.
+        depth : profundidad máxima.
+        warmup : ejecuciones de calentamiento.
+        repeat : ejecuciones medidas.
+    """
+    board = chess.Board(position["fen"])
+    results = []
+
+    for current in range(1, depth + 1):
+        def run():
+            reset_search()
+            return AI.machine_move(board, max_depth=current), AI.SEARCH_LIMITS.nodes
+
+        elapsed, (movement, nodes) = measure(run, warmup, repeat)
+        results.append({"depth": current, "ms": round(elapsed, 3), "nodes": nodes, "move": movement})
+
+    return results
+
+
+def bench_placement(position, depth, warmup, repeat):
+    """
+    Mide put_piece con la ficha robada de una posición de colocación, con
+    las tablas vacías. Devuelve los milisegundos, los nodos y la casilla.
+
+        position : posición de colocación del banco de pruebas.
+        depth : profundidad de la búsqueda.
+        warmup : ejecuciones de calentamiento.
+        repeat : ejecuciones medidas.
+    """
+    board = chess.Board(position["fen"])
+    piece = chess.Piece.from_symbol(position["piece"])
+
+    def run():
+        reset_search()
+        return AI.put_piece(board, piece, max_depth=depth), AI.SEARCH_LIMITS.nodes
+
+    elapsed, (square, nodes) = measure(run, warmup, repeat)
+    return {"depth": depth, "ms": round(elapsed, 3), "nodes": nodes,
+            "square": chess.square_name(square) if square is not None else None}
+
+
+def bench_evaluation(positions, warmup, repeat):
+    """
+    Mide las evaluaciones por segundo de evaluate_position y, si NumPy está
+    disponible, las de la evaluación por lotes (evaluation.evaluate_boards).
+
+        positions : posiciones del banco de pruebas.
+        warmup : ejecuciones de calentamiento.
+        repeat : ejecuciones medidas.
+    """
+    boards = [Position(chess.Board(position["fen"])) for position in positions]
+
+    def run():
+        for board in boards:
+            for _ in range(EVALUATIONS):
+                AI.evaluate_position(board)
+
+    elapsed, _ = measure(run, warmup, repeat)
+    results = {"evaluations_per_second": round(len(boards) * EVALUATIONS / elapsed * 1000)}
+
+    if evaluation.available():
+        batch = [chess.Board(position["fen"]) for position in positions] * (EVALUATIONS // 10)
+        elapsed, _ = measure(lambda: evaluation.evaluate_boards(batch), warmup, repeat)
+        results["batch_evaluations_per_second"] = round(len(batch) / elapsed * 1000)
+
+    return results
+
+
+def bench_render(positions, warmup, repeat):
+    """
+    Mide el dibujo de la ventana de main sin pantalla (controlador "dummy"
+    de SDL): un cuadro completo tras invalidar la capa estática y un cuadro
+    sin cambios. Devuelve los milisegundos por cuadro.
+
+        positions : posiciones del banco de pruebas.
+        warmup : ejecuciones de calentamiento.
+        repeat : ejecuciones medidas.
+    """
+    # Sin pantalla y sin el saludo de pygame, que se mezclaría con el JSON.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+    # main carga las fuentes y las imágenes con rutas relativas a la raíz del proyecto.
+    previous = os.getcwd()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        import main
+
+        window = main.init_display()
+        grid = main.make_grid(8, main.WIDTH)
+
+        def draw(full):
+            for position in positions:
+                main.board.set_fen(position["fen"])
+                for _ in range(FRAMES // len(positions) or 1):
+                    if full:
+                        main.RENDERER.invalidate()
+                    main.update_display(window, grid, 8, main.WIDTH, 0)
+
+        frames = (FRAMES // len(positions) or 1) * len(positions)
+        full, _ = measure(lambda: draw(True), warmup, repeat)
+        idle, _ = measure(lambda: draw(False), warmup, repeat)
+        main.board.reset()
+    finally:
+        os.chdir(previous)
+
+    return {"render_full_ms": round(full / frames, 4), "render_idle_ms": round(idle / frames, 4)}
+
+
+def run_benchmark(positions, depth=BENCHMARK_DEPTH, warmup=WARMUP, repeat=REPEAT, render=False):
+    """
+    Ejecuta el banco de pruebas completo y devuelve los resultados: el
+    detalle de cada posición y un resumen con las métricas de METRICS y el
+    tiempo total hasta cada profundidad.
+
+        positions : posiciones del banco de pruebas.
+        depth : profundidad máxima de las búsquedas.
+        warmup : ejecuciones de calentamiento de cada prueba.
+        repeat : ejecuciones medidas de cada prueba.
+        render : si se mide también el dibujo de la interfaz.
+    """
+    details = []
+    for position in positions:
+        result = dict(position)
+        if position["piece"]:
+            result["placement"] = bench_placement(position, depth, warmup, repeat)
+        else:
+            result["search"] = bench_search(position, depth, warmup, repeat)
+        details.append(result)
+
+    searches = [result["search"] for result in details if "search" in result]
+    placements = [result["placement"] for result in details if "placement" in result]
+
+    summary = {}
+    if searches:
+        deepest = [search[-1] for search in searches]
+        summary["nodes_per_second"] = round(sum(run["nodes"] for run in deepest)
+                                            / sum(run["ms"] for run in deepest) * 1000)
+        summary["time_to_depth_ms"] = {str(current + 1): round(sum(search[current]["ms"] for search in searches), 3)
+                                       for current in range(depth)}
+        summary["nodes"] = sum(run["nodes"] for run in deepest)
+    if placements:
+        summary["placement_ms"] = round(statistics.median(run["ms"] for run in placements), 3)
+    summary.update(bench_evaluation(positions, warmup, repeat))
+    if render:
+        summary.update(bench_render(positions, warmup, repeat))
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "depth": depth,
+        "warmup": warmup,
+        "repeat": repeat,
+        "summary": summary,
+        "positions": details,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compara el resumen de unos resultados con el de una ejecución anterior.
+    Devuelve una lista de líneas (métrica, valor anterior, valor actual,
+    cambio relativo, si es una regresión). Los nodos no cuentan como
+    regresión, pero si cambian la búsqueda ya no es la misma y conviene
+    revisarlo.
+
+        results : resultados actuales.
+        baseline : resultados de referencia.
+        tolerance : empeoramiento relativo permitido.
+    """
+    current, previous = results["summary"], baseline["summary"]
+    lines = []
+
+    names = list(METRICS) + ["time_to_depth_ms/" + key for key in current.get("time_to_depth_ms", {})]
+    for name in names:
+        if "/" in name:
+            group, key = name.split("/")
+            before, after = previous.get(group, {}).get(key), current.get(group, {}).get(key)
+            higher_is_better = False
+        else:
+            before, after = previous.get(name), current.get(name)
+            higher_is_better = METRICS[name]
+        if not before or after is None:
+            continue
+
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        lines.append((name, before, after, change, worse > tolerance))
+
+    # Si alguna de las dos ejecuciones no buscó movimientos (por ejemplo, con
+    # --category placement) no hay nodos que comparar.
+    before, after = previous.get("nodes"), current.get("nodes")
+    if before is not None and after is not None and before != after:
+        lines.append(("nodes", before, after, 0.0, False))
+
+    return lines
+
+
+def main(argv=None):
+    """
+    Ejecuta el banco de pruebas, escribe los resultados en JSON y, si se da
+    una referencia, marca las regresiones. Termina con código 1 si hay
+    alguna.
+    """
+    parser = argparse.ArgumentParser(description="Banco de pruebas del motor.")
+    parser.add_argument("-d", "--depth", type=int, default=BENCHMARK_DEPTH, help="profundidad máxima")
+    parser.add_argument("--warmup", type=int, default=WARMUP, help="ejecuciones de calentamiento")
+    parser.add_argument("-r", "--repeat", type=int, default=REPEAT, help="ejecuciones medidas")
+    parser.add_argument("--positions", default=POSITIONS_FILE, help="archivo de posiciones")
+    parser.add_argument("--category", action="append", help="medir solo esta categoría (se puede repetir)")
+    parser.add_argument("--render", action="store_true", help="medir también el dibujo de la interfaz")
+    parser.add_argument("-o", "--output", help="archivo JSON de resultados (por defecto, la salida estándar)")
+    parser.add_argument("-c", "--compare", help="resultados de referencia con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="empeoramiento relativo permitido")
+    args = parser.parse_args(argv)
+
+    positions = load_positions(args.positions)
+    if args.category:
+        positions = [position for position in positions if position["category"] in args.category]
+
+    results = run_benchmark(positions, args.depth, args.warmup, args.repeat, args.render)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        lines = compare(results, baseline, args.tolerance)
+        for name, before, after, change, regression in lines:
+            mark = "REGRESIÓN" if regression else ""
+            print(f"{name:32} {before:>14} {after:>14} {change:+8.1%} {mark}", file=sys.stderr)
+
+        if any(line[4] for line in lines):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
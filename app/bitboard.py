@@ -0,0 +1,753 @@
+import chess
+
+# ============================================================
+#                 TABLERO INTERNO DEL MOTOR
+# ============================================================
+
+# Tablas precalculadas de python-chess: ataques de caballo, rey y peón desde
+# cada casilla, y ataques deslizantes indexados por la ocupación de la línea
+# (fila, columna o diagonales) de la casilla. No son tablas mágicas: se indexan
+# con un diccionario por la ocupación exacta de la línea, sin multiplicar por
+# un número mágico, igual que hace python-chess.
+SQUARES = chess.BB_SQUARES
+KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+KING_ATTACKS = chess.BB_KING_ATTACKS
+PAWN_ATTACKS = chess.BB_PAWN_ATTACKS
+DIAG_MASKS = chess.BB_DIAG_MASKS
+DIAG_ATTACKS = chess.BB_DIAG_ATTACKS
+RANK_MASKS = chess.BB_RANK_MASKS
+RANK_ATTACKS = chess.BB_RANK_ATTACKS
+FILE_MASKS = chess.BB_FILE_MASKS
+FILE_ATTACKS = chess.BB_FILE_ATTACKS
+
+# Piezas en que promueve un peón, en el mismo orden que python-chess.
+PROMOTIONS = (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+
+# Filas donde promueven los peones.
+BACK_RANKS = chess.BB_RANK_1 | chess.BB_RANK_8
+
+
+class Position:
+    """
+    Tablero compacto que usa internamente la búsqueda. Reproduce la parte de
+    chess.Board que usa el motor (mismos nombres de atributos y métodos), pero
+    genera movimientos pseudo-legales y comprueba la legalidad solo de los
+    movimientos que se llegan a buscar, con is_legal(). push() guarda el estado
+    completo en una tupla y pop() lo restaura, sin más cálculos.
+
+    Se convierte desde y hacia chess.Board (o FEN) en los bordes del motor:
+    machine_move, put_piece y los procesos trabajadores.
+    """
+
+    __slots__ = ("pawns", "knights", "bishops", "rooks", "queens", "kings", "occupied_co", "occupied",
+                 "turn", "castling_rights", "ep_square", "halfmove_clock", "fullmove_number",
+                 "move_stack", "_stack", "_legality")
+
+    def __init__(self, board=None):
+        """
+        Crea el tablero a partir de un chess.Board (o de la posición inicial).
+
+            board : tablero de python-chess a convertir.
+        """
+        if board is None:
+            board = chess.Board()
+
+        self.pawns = board.pawns
+        self.knights = board.knights
+        self.bishops = board.bishops
+        self.rooks = board.rooks
+        self.queens = board.queens
+        self.kings = board.kings
+        self.occupied_co = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        self.occupied = board.occupied
+        self.turn = board.turn
+        self.castling_rights = board.castling_rights
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.move_stack = []
+        self._stack = []
+        self._legality = None
+
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Crea el tablero a partir de una cadena FEN.
+
+            fen : posición en notación FEN.
+        """
+        return cls(chess.Board(fen))
+
+
+    def to_board(self):
+        """
+        Devuelve la posición actual como chess.Board (sin la pila de movimientos).
+        """
+        board = chess.Board(None)
+        board.pawns = self.pawns
+        board.knights = self.knights
+        board.bishops = self.bishops
+        board.rooks = self.rooks
+        board.queens = self.queens
+        board.kings = self.kings
+        board.occupied_co = [self.occupied_co[chess.BLACK], self.occupied_co[chess.WHITE]]
+        board.occupied = self.occupied
+        board.turn = self.turn
+        board.castling_rights = self.castling_rights
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+
+        return board
+
+
+    def fen(self):
+        """
+        Devuelve la posición en notación FEN.
+        """
+        return self.to_board().fen()
+
+
+    def copy(self):
+        """
+        Devuelve una copia del tablero, con su pila de movimientos.
+        """
+        board = Position.__new__(Position)
+        for name in Position.__slots__:
+            setattr(board, name, getattr(self, name))
+        board.occupied_co = list(self.occupied_co)
+        board.move_stack = list(self.move_stack)
+        board._stack = list(self._stack)
+
+        return board
+
+    # --------------------------------------------------------
+    #                 CONSULTAS
+    # --------------------------------------------------------
+
+    def ply(self):
+        """
+        Devuelve el número de medias jugadas desde el comienzo de la partida.
+        """
+        return 2 * (self.fullmove_number - 1) + (self.turn == chess.BLACK)
+
+
+    def piece_type_at(self, square):
+        """
+        Devuelve el tipo de pieza de una casilla o None si está vacía.
+
+            square : casilla a consultar.
+        """
+        mask = SQUARES[square]
+
+        if not self.occupied & mask:
+            return None
+        if self.pawns & mask:
+            return chess.PAWN
+        if self.knights & mask:
+            return chess.KNIGHT
+        if self.bishops & mask:
+            return chess.BISHOP
+        if self.rooks & mask:
+            return chess.ROOK
+        if self.queens & mask:
+            return chess.QUEEN
+        return chess.KING
+
+
+    def piece_at(self, square):
+        """
+        Devuelve la pieza (chess.Piece) de una casilla o None si está vacía.
+
+            square : casilla a consultar.
+        """
+        piece_type = self.piece_type_at(square)
+        if piece_type is None:
+            return None
+
+        return chess.Piece(piece_type, bool(self.occupied_co[chess.WHITE] & SQUARES[square]))
+
+
+    def pieces_mask(self, piece_type, color):
+        """
+        Devuelve la máscara de las piezas de un tipo y un color.
+
+            piece_type : tipo de pieza.
+            color : color de las piezas.
+        """
+        masks = (0, self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings)
+
+        return masks[piece_type] & self.occupied_co[color]
+
+
+    def pieces(self, piece_type, color):
+        """
+        Devuelve las casillas de las piezas de un tipo y un color.
+
+            piece_type : tipo de pieza.
+            color : color de las piezas.
+        """
+        return chess.SquareSet(self.pieces_mask(piece_type, color))
+
+
+    def piece_map(self):
+        """
+        Devuelve un diccionario con la pieza (chess.Piece) de cada casilla ocupada.
+        """
+        return {square: self.piece_at(square) for square in chess.scan_reversed(self.occupied)}
+
+
+    def attacks_mask(self, square):
+        """
+        Devuelve la máscara de casillas atacadas por la pieza de una casilla.
+
+            square : casilla de la pieza.
+        """
+        mask = SQUARES[square]
+
+        if mask & self.pawns:
+            return PAWN_ATTACKS[bool(mask & self.occupied_co[chess.WHITE])][square]
+        if mask & self.knights:
+            return KNIGHT_ATTACKS[square]
+        if mask & self.kings:
+            return KING_ATTACKS[square]
+
+        attacks = 0
+        if mask & (self.bishops | self.queens):
+            attacks = DIAG_ATTACKS[square][DIAG_MASKS[square] & self.occupied]
+        if mask & (self.rooks | self.queens):
+            attacks |= (RANK_ATTACKS[square][RANK_MASKS[square] & self.occupied]
+                        | FILE_ATTACKS[square][FILE_MASKS[square] & self.occupied])
+
+        return attacks
+
+
+    def attackers_mask(self, color, square, occupied=None):
+        """
+        Devuelve la máscara de piezas de un color que atacan una casilla.
+
+            color : color de los atacantes.
+            square : casilla atacada.
+            occupied : ocupación del tablero a considerar (por defecto, la actual).
+        """
+        if occupied is None:
+            occupied = self.occupied
+
+        queens_and_rooks = self.queens | self.rooks
+        queens_and_bishops = self.queens | self.bishops
+
+        attackers = ((KING_ATTACKS[square] & self.kings)
+                     | (KNIGHT_ATTACKS[square] & self.knights)
+                     | (RANK_ATTACKS[square][RANK_MASKS[square] & occupied] & queens_and_rooks)
+                     | (FILE_ATTACKS[square][FILE_MASKS[square] & occupied] & queens_and_rooks)
+                     | (DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied] & queens_and_bishops)
+                     | (PAWN_ATTACKS[not color][square] & self.pawns))
+
+        return attackers & self.occupied_co[color]
+
+
+    def clean_castling_rights(self):
+        """
+        Devuelve los derechos de enroque válidos: torres en su esquina y rey en
+        su casilla inicial, igual que chess.Board.clean_castling_rights.
+        """
+        castling = self.castling_rights & self.rooks
+        if not castling:
+            return 0
+
+        white = castling & chess.BB_RANK_1 & self.occupied_co[chess.WHITE] & (chess.BB_A1 | chess.BB_H1)
+        black = castling & chess.BB_RANK_8 & self.occupied_co[chess.BLACK] & (chess.BB_A8 | chess.BB_H8)
+
+        if not self.occupied_co[chess.WHITE] & self.kings & chess.BB_E1:
+            white = 0
+        if not self.occupied_co[chess.BLACK] & self.kings & chess.BB_E8:
+            black = 0
+
+        return white | black
+
+
+    def _legality_info(self):
+        """
+        Devuelve (y guarda hasta el siguiente cambio del tablero) la casilla del
+        rey del jugador que mueve, sus piezas clavadas y las piezas que le dan
+        jaque. La casilla es None si no hay rey.
+        """
+        info = self._legality
+
+        if info is None:
+            king_mask = self.kings & self.occupied_co[self.turn]
+            if not king_mask:
+                info = (None, 0, 0)
+            else:
+                king = king_mask.bit_length() - 1
+                info = (king, self._slider_blockers(king), self.attackers_mask(not self.turn, king))
+            self._legality = info
+
+        return info
+
+
+    def _slider_blockers(self, king):
+        """
+        Devuelve las piezas propias que son la única pieza entre el rey y una
+        pieza rival que se desliza (alfil, torre o dama), es decir, las clavadas.
+
+            king : casilla del rey.
+        """
+        rooks_and_queens = self.rooks | self.queens
+        bishops_and_queens = self.bishops | self.queens
+
+        snipers = ((RANK_ATTACKS[king][0] & rooks_and_queens)
+                   | (FILE_ATTACKS[king][0] & rooks_and_queens)
+                   | (DIAG_ATTACKS[king][0] & bishops_and_queens)) & self.occupied_co[not self.turn]
+
+        blockers = 0
+        while snipers:
+            sniper = snipers.bit_length() - 1
+            snipers ^= SQUARES[sniper]
+            between = chess.between(king, sniper) & self.occupied
+            if between and not between & (between - 1):
+                blockers |= between
+
+        return blockers & self.occupied_co[self.turn]
+
+
+    def checkers_mask(self):
+        """
+        Devuelve la máscara de piezas que dan jaque al jugador que mueve.
+        """
+        return self._legality_info()[2]
+
+
+    def is_check(self):
+        """
+        Indica si el jugador que mueve está en jaque.
+        """
+        return bool(self._legality_info()[2])
+
+    # --------------------------------------------------------
+    #                 GENERACIÓN DE MOVIMIENTOS
+    # --------------------------------------------------------
+
+    def generate_pseudo_legal_moves(self):
+        """
+        Devuelve la lista de movimientos pseudo-legales (pueden dejar al rey en
+        jaque) del jugador que mueve. Los enroques solo se generan si son
+        legales, como en python-chess.
+        """
+        Move = chess.Move
+        turn = self.turn
+        ours = self.occupied_co[turn]
+        theirs = self.occupied_co[not turn]
+        occupied = self.occupied
+        targets = ~ours & chess.BB_ALL
+        moves = []
+
+        # Movimientos de las piezas (salvo peones), en el mismo orden que
+        # python-chess, de modo que el ordenamiento de la búsqueda desempata igual.
+        bishops_and_queens = self.bishops | self.queens
+        rooks_and_queens = self.rooks | self.queens
+        pieces = ours & ~self.pawns
+        while pieces:
+            from_square = pieces.bit_length() - 1
+            mask = SQUARES[from_square]
+            pieces ^= mask
+
+            if mask & self.knights:
+                attacks = KNIGHT_ATTACKS[from_square]
+            elif mask & self.kings:
+                attacks = KING_ATTACKS[from_square]
+            else:
+                attacks = 0
+                if mask & bishops_and_queens:
+                    attacks = DIAG_ATTACKS[from_square][DIAG_MASKS[from_square] & occupied]
+                if mask & rooks_and_queens:
+                    attacks |= (RANK_ATTACKS[from_square][RANK_MASKS[from_square] & occupied]
+                                | FILE_ATTACKS[from_square][FILE_MASKS[from_square] & occupied])
+
+            attacks &= targets
+            while attacks:
+                to_square = attacks.bit_length() - 1
+                attacks ^= SQUARES[to_square]
+                moves.append(Move(from_square, to_square))
+
+        if self.castling_rights:
+            self._generate_castling_moves(moves)
+
+        pawns = self.pawns & ours
+        if not pawns:
+            return moves
+
+        # Capturas de peón (con promoción si llegan a la última fila).
+        pieces = pawns
+        while pieces:
+            from_square = pieces.bit_length() - 1
+            pieces ^= SQUARES[from_square]
+            attacks = PAWN_ATTACKS[turn][from_square] & theirs
+            while attacks:
+                to_square = attacks.bit_length() - 1
+                attacks ^= SQUARES[to_square]
+                if SQUARES[to_square] & BACK_RANKS:
+                    for promotion in PROMOTIONS:
+                        moves.append(Move(from_square, to_square, promotion))
+                else:
+                    moves.append(Move(from_square, to_square))
+
+        # Avances simples y dobles. Igual que en python-chess, el avance doble
+        # es cualquier avance simple seguido de otro hasta la tercera o cuarta
+        # fila (sexta o quinta para las negras), lo que incluye a los peones
+        # colocados en la primera fila.
+        empty = ~occupied
+        if turn == chess.WHITE:
+            single_moves = pawns << 8 & empty & chess.BB_ALL
+            double_moves = single_moves << 8 & empty & (chess.BB_RANK_3 | chess.BB_RANK_4)
+            step = -8
+        else:
+            single_moves = pawns >> 8 & empty
+            double_moves = single_moves >> 8 & empty & (chess.BB_RANK_6 | chess.BB_RANK_5)
+            step = 8
+
+        while single_moves:
+            to_square = single_moves.bit_length() - 1
+            single_moves ^= SQUARES[to_square]
+            if SQUARES[to_square] & BACK_RANKS:
+                for promotion in PROMOTIONS:
+                    moves.append(Move(to_square + step, to_square, promotion))
+            else:
+                moves.append(Move(to_square + step, to_square))
+
+        while double_moves:
+            to_square = double_moves.bit_length() - 1
+            double_moves ^= SQUARES[to_square]
+            moves.append(Move(to_square + 2 * step, to_square))
+
+        # Captura al paso.
+        ep_square = self.ep_square
+        if ep_square is not None and not SQUARES[ep_square] & occupied:
+            capturers = (pawns & PAWN_ATTACKS[not turn][ep_square]
+                         & chess.BB_RANKS[4 if turn == chess.WHITE else 3])
+            while capturers:
+                from_square = capturers.bit_length() - 1
+                capturers ^= SQUARES[from_square]
+                moves.append(Move(from_square, ep_square))
+
+        return moves
+
+
+    def _generate_castling_moves(self, moves):
+        """
+        Añade a la lista los enroques legales: el rey y la torre en su casilla,
+        el camino libre y sin casillas atacadas para el rey.
+
+            moves : lista de movimientos a la que se añaden los enroques.
+        """
+        turn = self.turn
+        backrank = chess.BB_RANK_1 if turn == chess.WHITE else chess.BB_RANK_8
+        king = self.occupied_co[turn] & self.kings & backrank
+        king &= -king
+        if not king:
+            return
+
+        king_square = king.bit_length() - 1
+        occupied = self.occupied
+
+        for candidate in chess.scan_reversed(self.clean_castling_rights() & backrank):
+            rook = SQUARES[candidate]
+            a_side = rook < king
+            king_to = (chess.BB_FILE_C if a_side else chess.BB_FILE_G) & backrank
+            rook_to = (chess.BB_FILE_D if a_side else chess.BB_FILE_F) & backrank
+            king_to_square = king_to.bit_length() - 1
+
+            king_path = chess.between(king_square, king_to_square)
+            rook_path = chess.between(candidate, rook_to.bit_length() - 1)
+
+            if (occupied ^ king ^ rook) & (king_path | rook_path | king_to | rook_to):
+                continue
+            if self._attacked_for_king(king_path | king, occupied ^ king):
+                continue
+            if self._attacked_for_king(king_to, occupied ^ king ^ rook ^ rook_to):
+                continue
+
+            moves.append(chess.Move(king_square, king_to_square))
+
+
+    def _attacked_for_king(self, path, occupied):
+        """
+        Indica si alguna casilla del camino del rey está atacada por el rival.
+
+            path : máscara de casillas del camino.
+            occupied : ocupación del tablero a considerar.
+        """
+        for square in chess.scan_reversed(path):
+            if self.attackers_mask(not self.turn, square, occupied):
+                return True
+
+        return False
+
+
+    def generate_drops(self, piece_type):
+        """
+        Devuelve las colocaciones de una pieza en cada casilla vacía, como
+        movimientos con drop.
+
+            piece_type : tipo de la pieza que se coloca.
+        """
+        return [chess.Move(square, square, drop=piece_type)
+                for square in chess.scan_reversed(~self.occupied & chess.BB_ALL)]
+
+
+    def is_legal(self, move):
+        """
+        Indica si un movimiento pseudo-legal de generate_pseudo_legal_moves no
+        deja al rey propio en jaque.
+
+            move : movimiento pseudo-legal (chess.Move).
+        """
+        king, blockers, checkers = self._legality_info()
+        if king is None:
+            return True
+
+        from_square = move.from_square
+        to_square = move.to_square
+
+        if from_square == king:
+            # Los enroques ya se generan solo si son legales.
+            if to_square - from_square in (2, -2) and not checkers:
+                return True
+            return not self.attackers_mask(not self.turn, to_square, self.occupied ^ SQUARES[king])
+
+        en_passant = (to_square == self.ep_square and SQUARES[from_square] & self.pawns
+                      and (to_square - from_square) % 8 != 0)
+
+        if checkers:
+            # Con jaque doble solo puede mover el rey; con jaque simple hay que
+            # capturar a la pieza que da jaque o interponerse.
+            if checkers & (checkers - 1):
+                return False
+            checker = checkers.bit_length() - 1
+            if not (chess.between(king, checker) | checkers) & SQUARES[to_square]:
+                if not en_passant or to_square ^ 8 != checker:
+                    return False
+
+        if en_passant:
+            self.push(move)
+            safe = not self.attackers_mask(self.turn, king)
+            self.pop()
+            return safe
+
+        return not blockers & SQUARES[from_square] or bool(chess.ray(from_square, to_square) & SQUARES[king])
+
+
+    @property
+    def legal_moves(self):
+        """
+        Lista de movimientos legales del jugador que mueve.
+        """
+        return [move for move in self.generate_pseudo_legal_moves() if self.is_legal(move)]
+
+    # --------------------------------------------------------
+    #                 APLICAR Y DESHACER
+    # --------------------------------------------------------
+
+    def _set_piece_at(self, square, piece_type, color, promoted=False):
+        """
+        Coloca una pieza en una casilla (que debe estar vacía) sin tocar la pila
+        de movimientos, como chess.Board._set_piece_at.
+
+            square : casilla donde se coloca la pieza.
+            piece_type : tipo de la pieza.
+            color : color de la pieza.
+            promoted : no se usa; se acepta por compatibilidad con python-chess.
+        """
+        mask = SQUARES[square]
+        self._remove_piece_at(square)
+
+        if piece_type == chess.PAWN:
+            self.pawns |= mask
+        elif piece_type == chess.KNIGHT:
+            self.knights |= mask
+        elif piece_type == chess.BISHOP:
+            self.bishops |= mask
+        elif piece_type == chess.ROOK:
+            self.rooks |= mask
+        elif piece_type == chess.QUEEN:
+            self.queens |= mask
+        else:
+            self.kings |= mask
+
+        self.occupied ^= mask
+        self.occupied_co[color] ^= mask
+        self._legality = None
+
+
+    def _remove_piece_at(self, square):
+        """
+        Retira la pieza de una casilla sin tocar la pila de movimientos y
+        devuelve su tipo (None si estaba vacía).
+
+            square : casilla de la pieza.
+        """
+        piece_type = self.piece_type_at(square)
+        if piece_type is None:
+            return None
+
+        mask = ~SQUARES[square]
+        if piece_type == chess.PAWN:
+            self.pawns &= mask
+        elif piece_type == chess.KNIGHT:
+            self.knights &= mask
+        elif piece_type == chess.BISHOP:
+            self.bishops &= mask
+        elif piece_type == chess.ROOK:
+            self.rooks &= mask
+        elif piece_type == chess.QUEEN:
+            self.queens &= mask
+        else:
+            self.kings &= mask
+
+        self.occupied &= mask
+        self.occupied_co[chess.WHITE] &= mask
+        self.occupied_co[chess.BLACK] &= mask
+        self._legality = None
+
+        return piece_type
+
+
+    def push(self, move):
+        """
+        Aplica un movimiento pseudo-legal, un movimiento nulo o una colocación
+        (con el color del jugador que mueve, como chess.Board.push). Las reglas
+        de enroque, captura al paso y promoción son las de python-chess.
+
+            move : movimiento (chess.Move) a aplicar.
+        """
+        turn = self.turn
+        self._stack.append((self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+                            self.occupied_co[chess.BLACK], self.occupied_co[chess.WHITE], self.occupied,
+                            turn, self.castling_rights, self.ep_square, self.halfmove_clock, self.fullmove_number))
+        self.move_stack.append(move)
+
+        ep_square = self.ep_square
+        self.ep_square = None
+        self.halfmove_clock += 1
+        if turn == chess.BLACK:
+            self.fullmove_number += 1
+
+        if not move:
+            self.turn = not turn
+            self._legality = None
+            return
+
+        from_square = move.from_square
+        to_square = move.to_square
+
+        if move.drop:
+            self._set_piece_at(to_square, move.drop, turn)
+            self.turn = not turn
+            return
+
+        rights = self.clean_castling_rights() if self.castling_rights else 0
+        piece_type = self._remove_piece_at(from_square)
+        captured = self._remove_piece_at(to_square)
+
+        if piece_type == chess.PAWN or captured:
+            self.halfmove_clock = 0
+
+        # Se pierden los derechos de enroque de las casillas que se tocan y, si
+        # mueve o se captura un rey, todos los de su color.
+        if rights:
+            rights &= ~(SQUARES[from_square] | SQUARES[to_square])
+            if piece_type == chess.KING:
+                rights &= ~(chess.BB_RANK_1 if turn == chess.WHITE else chess.BB_RANK_8)
+            elif captured == chess.KING:
+                if turn == chess.WHITE and to_square >> 3 == 7:
+                    rights &= ~chess.BB_RANK_8
+                elif turn == chess.BLACK and to_square >> 3 == 0:
+                    rights &= ~chess.BB_RANK_1
+        self.castling_rights = rights
+
+        if piece_type == chess.PAWN:
+            diff = to_square - from_square
+            if diff == 16 and from_square >> 3 == 1:
+                self.ep_square = from_square + 8
+            elif diff == -16 and from_square >> 3 == 6:
+                self.ep_square = from_square - 8
+            elif to_square == ep_square and diff % 8 and not captured:
+                self._remove_piece_at(to_square ^ 8)
+
+        if move.promotion:
+            piece_type = move.promotion
+
+        self._set_piece_at(to_square, piece_type, turn)
+
+        # Enroque: la torre pasa de la esquina a la casilla junto al rey.
+        if piece_type == chess.KING and to_square - from_square in (2, -2):
+            rank = from_square & ~7
+            if to_square > from_square:
+                self._remove_piece_at(rank + 7)
+                self._set_piece_at(rank + 5, chess.ROOK, turn)
+            else:
+                self._remove_piece_at(rank)
+                self._set_piece_at(rank + 3, chess.ROOK, turn)
+
+        self.turn = not turn
+        self._legality = None
+
+
+    def pop(self):
+        """
+        Deshace el último movimiento y lo devuelve.
+        """
+        (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+         black, white, self.occupied, self.turn, self.castling_rights, self.ep_square,
+         self.halfmove_clock, self.fullmove_number) = self._stack.pop()
+        self.occupied_co = [black, white]
+        self._legality = None
+
+        return self.move_stack.pop()
+
+# ============================================================
+#                 PERFT
+# ============================================================
+
+def perft(board, depth, drops=False):
+    """
+    Cuenta los nodos hoja del árbol de movimientos legales hasta la
+    profundidad dada, para comprobar el generador contra python-chess. Con
+    drops, tras cada captura el jugador que captura coloca la ficha (con su
+    color) en cada casilla vacía, como en el juego; la colocación no cuenta
+    como jugada.
+
+        board : tablero (Position).
+        depth : profundidad en jugadas.
+        drops : indica si se incluyen las colocaciones tras las capturas.
+    """
+    if depth == 0:
+        return 1
+
+    nodes = 0
+
+    for move in board.generate_pseudo_legal_moves():
+        if not board.is_legal(move):
+            continue
+
+        captured = None
+        if drops:
+            captured = board.piece_type_at(move.to_square)
+            if not captured and move.to_square == board.ep_square and board.pawns & SQUARES[move.from_square]:
+                captured = chess.PAWN
+
+        board.push(move)
+
+        if captured:
+            color = not board.turn
+            for square in chess.scan_reversed(~board.occupied & chess.BB_ALL):
+                board._set_piece_at(square, captured, color)
+                nodes += perft(board, depth - 1, drops)
+                board._remove_piece_at(square)
+        else:
+            nodes += perft(board, depth - 1, drops)
+
+        board.pop()
+
+    return nodes
@@ -0,0 +1,345 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+
+import chess
+
+from transposition import decode_move, encode_drop, encode_move, zobrist_hash
+
+# ============================================================
+#                 LIBRO DE APERTURAS
+# ============================================================
+
+# Formato del archivo: una cabecera (marca, versión y número de registros) y
+# los registros (hash de Zobrist de la posición, jugada codificada como en la
+# tabla de transposiciones y peso) ordenados por hash, todos del mismo tamaño.
+# Las posiciones son siempre con las negras (la máquina) por jugar; las
+# colocaciones se guardan con el hash que incluye la ficha pendiente.
+BOOK_MAGIC = b"CCBOOK\0\0"
+BOOK_VERSION = 1
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<QIHxx")
+KEY = struct.Struct("<Q")
+
+# El libro que usa la interfaz (book.bin, junto a este módulo) se construyó
+# con 900 partidas de selfplay a profundidad 3, desde la raíz del proyecto. Al
+# comienzo solo juegan al azar las blancas (la primera jugada, o las dos
+# primeras), y las negras responden siempre con el motor:
+#
+#   python app/selfplay.py -n 300 -w 1 -a depth=3 -b depth=3 --random-plies 2 --random-color white --seed 11 > book1.jsonl
+#   python app/selfplay.py -n 600 -w 1 -a depth=3 -b depth=3 --random-plies 4 --random-color white --seed 12 > book3.jsonl
+#   python app/book.py book1.jsonl book3.jsonl -o app/book.bin
+#
+# Tiene respuesta a las 20 primeras jugadas de las blancas y a 240 de las 445
+# segundas jugadas sin captura que siguen a sus respuestas (book.py lo muestra
+# al construirlo). Fuera de esas posiciones, la máquina busca con el motor.
+#
+# Las partidas son deterministas, así que se obtiene el mismo archivo mientras
+# no cambie la búsqueda; si cambia, hay que volver a construirlo.
+
+# Peso máximo de una jugada (el campo del registro es de 16 bits).
+MAX_WEIGHT = 0xFFFF
+
+# Jugadas (medias) de cada partida que se guardan en el libro.
+BOOK_PLIES = 16
+
+# Peso que suma cada jugada según el resultado de la partida para quien la jugó.
+# Las derrotas también suman (poco): en las posiciones en que la máquina solo
+# perdió, la mejor jugada conocida sigue siendo mejor que salir del libro.
+RESULT_WEIGHTS = {"win": 4, "draw": 2, "loss": 1}
+
+
+class OpeningBook:
+    """
+    Libro de aperturas en un archivo proyectado en memoria (mmap). No se lee
+    al abrirlo: cada consulta busca el hash por bisección directamente sobre
+    los registros ordenados, así que abrir el libro y consultarlo cuesta unos
+    pocos microsegundos sea cual sea su tamaño.
+    """
+
+    def __init__(self, path):
+        """
+        Abre un libro escrito con write_book.
+
+            path : archivo del libro.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self.close()
+            raise ValueError(f"{path} no es un libro de aperturas de la versión {BOOK_VERSION}")
+        if HEADER.size + self.count * RECORD.size > len(self.data):
+            self.close()
+            raise ValueError(f"{path} está incompleto")
+
+
+    def __len__(self):
+        return self.count
+
+
+    def close(self):
+        """
+        Cierra el archivo del libro.
+        """
+        self.data.close()
+        self.file.close()
+
+
+    def entries(self, key):
+        """
+        Devuelve las jugadas del libro para una posición como una lista de
+        tuplas (jugada codificada, peso), vacía si la posición no está.
+
+            key : hash de Zobrist de la posición.
+        """
+        data = self.data
+        low, high = 0, self.count
+
+        # Primer registro con un hash mayor o igual que key.
+        while low < high:
+            middle = (low + high) >> 1
+            if KEY.unpack_from(data, HEADER.size + middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        for index in range(low, self.count):
+            record_key, code, weight = RECORD.unpack_from(data, HEADER.size + index * RECORD.size)
+            if record_key != key:
+                break
+            entries.append((code, weight))
+
+        return entries
+
+
+    def choose(self, key, weighted_random=False, rng=random):
+        """
+        Elige una jugada del libro para una posición: la de mayor peso o, si
+        weighted_random, una al azar con probabilidad proporcional a su peso.
+        Devuelve la jugada codificada, o 0 si la posición no está.
+
+            key : hash de Zobrist de la posición.
+            weighted_random : si se elige al azar según el peso.
+            rng : generador de números aleatorios.
+        """
+        entries = self.entries(key)
+        if not entries:
+            return 0
+        if weighted_random:
+            return rng.choices([code for code, _ in entries], [weight for _, weight in entries])[0]
+
+        return max(entries, key=lambda entry: entry[1])[0]
+
+
+def coverage(book):
+    """
+    Devuelve cuántas jugadas de las blancas tienen respuesta en el libro:
+    (primeras jugadas con respuesta, primeras jugadas, segundas jugadas con
+    respuesta, segundas jugadas). Las segundas jugadas se cuentan tras cada
+    primera jugada con respuesta y la respuesta de mayor peso del libro.
+
+        book : libro de aperturas (OpeningBook).
+    """
+    board = chess.Board()
+    first = [0, 0]
+    second = [0, 0]
+
+    for move in list(board.legal_moves):
+        board.push(move)
+        first[1] += 1
+        code = book.choose(zobrist_hash(board))
+        first[0] += bool(code)
+
+        # Tras una captura la posición depende de dónde se coloque la ficha, así
+        # que solo se siguen las respuestas que no capturan.
+        reply = decode_move(code)
+        if isinstance(reply, chess.Move) and reply in board.legal_moves and not board.is_capture(reply):
+            board.push(reply)
+            for second_move in list(board.legal_moves):
+                if board.is_capture(second_move):
+                    continue
+                board.push(second_move)
+                second[1] += 1
+                second[0] += bool(book.choose(zobrist_hash(board)))
+                board.pop()
+            board.pop()
+
+        board.pop()
+
+    return first[0], first[1], second[0], second[1]
+
+
+def write_book(path, weights):
+    """
+    Escribe un libro de aperturas con las jugadas dadas.
+
+        path : archivo del libro.
+        weights : diccionario {(hash de la posición, jugada codificada): peso}.
+    """
+    records = sorted((key, code, min(weight, MAX_WEIGHT)) for (key, code), weight in weights.items() if weight > 0)
+
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(records)))
+        for record in records:
+            book_file.write(RECORD.pack(*record))
+
+    return len(records)
+
+# ============================================================
+#                 CONSTRUCCIÓN DEL LIBRO
+# ============================================================
+
+def engine_view(board, move):
+    """
+    Devuelve el tablero y la jugada vistos por la máquina, que siempre juega
+    con las negras: si mueven las blancas, el tablero y la jugada se
+    reflejan (las tablas de valores son simétricas).
+
+        board : tablero antes de la jugada.
+        move : jugada (chess.Move).
+    """
+    if board.turn == chess.BLACK:
+        return board, move
+
+    mirrored = chess.Move(chess.square_mirror(move.from_square), chess.square_mirror(move.to_square), move.promotion)
+    return board.mirror(), mirrored
+
+
+def add_move(weights, board, move, square, weight):
+    """
+    Suma el peso de una jugada (y de su colocación, si captura) al libro.
+
+        weights : pesos del libro que se está construyendo.
+        board : tablero antes de la jugada.
+        move : jugada (chess.Move).
+        square : casilla donde se colocó la ficha capturada (None si no captura).
+        weight : peso que se suma.
+    """
+    view, view_move = engine_view(board, move)
+    key = (zobrist_hash(view), encode_move(view_move))
+    weights[key] = weights.get(key, 0) + weight
+
+    if square is None:
+        return
+
+    captured = view.piece_type_at(view_move.to_square) or chess.PAWN
+    view = view.copy(stack=False)
+    view.push(view_move)
+    if board.turn == chess.WHITE:
+        square = chess.square_mirror(square)
+    key = (zobrist_hash(view, chess.Piece(captured, chess.BLACK)), encode_drop(square))
+    weights[key] = weights.get(key, 0) + weight
+
+
+def result_weight(result, color):
+    """
+    Devuelve el peso de las jugadas de un color según el resultado de la partida.
+
+        result : resultado ("1-0", "0-1" o "1/2-1/2").
+        color : color que jugó las jugadas.
+    """
+    if result == "1/2-1/2":
+        return RESULT_WEIGHTS["draw"]
+    won = (result == "1-0") == (color == chess.WHITE)
+    return RESULT_WEIGHTS["win" if won else "loss"]
+
+
+def add_selfplay(weights, path, plies=BOOK_PLIES):
+    """
+    Añade al libro las primeras jugadas de las partidas de selfplay (un
+    JSON por línea). Las jugadas al azar del comienzo se reproducen pero no
+    se guardan.
+
+        weights : pesos del libro que se está construyendo.
+        path : archivo de partidas de selfplay.
+        plies : jugadas (medias) de cada partida que se guardan.
+    """
+    with open(path) as games:
+        for line in games:
+            game = json.loads(line)
+            board = chess.Board()
+
+            for record in game["moves"][:plies]:
+                move = chess.Move.from_uci(record["move"])
+                square = record["drop"]
+                if not record.get("random"):
+                    add_move(weights, board, move, square, result_weight(game["result"], board.turn))
+
+                color = board.turn
+                captured = board.piece_type_at(move.to_square) or (chess.PAWN if board.is_en_passant(move) else None)
+                board.push(move)
+                if captured and square is not None:
+                    board.set_piece_at(square, chess.Piece(captured, color))
+
+
+def add_pgn(weights, path, plies=BOOK_PLIES):
+    """
+    Añade al libro las primeras jugadas de las partidas de un PGN. Son
+    partidas de ajedrez normal, así que solo se usan hasta la primera
+    captura: a partir de ahí la variante (que coloca la ficha capturada)
+    llevaría a otras posiciones.
+
+        weights : pesos del libro que se está construyendo.
+        path : archivo PGN.
+        plies : jugadas (medias) de cada partida que se guardan.
+    """
+    import chess.pgn
+
+    with open(path) as games:
+        while True:
+            game = chess.pgn.read_game(games)
+            if game is None:
+                break
+
+            result = game.headers.get("Result", "*")
+            board = game.board()
+            for move in list(game.mainline_moves())[:plies]:
+                if board.is_capture(move):
+                    break
+                if result != "*":
+                    add_move(weights, board, move, None, result_weight(result, board.turn))
+                board.push(move)
+
+
+def main(argv=None):
+    """
+    Construye un libro de aperturas a partir de partidas de selfplay (JSON
+    por línea) y de archivos PGN.
+    """
+    parser = argparse.ArgumentParser(description="Construye el libro de aperturas.")
+    parser.add_argument("games", nargs="+", help="partidas de selfplay (.jsonl) o PGN (.pgn)")
+    parser.add_argument("-o", "--output", default="book.bin", help="archivo del libro")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="jugadas (medias) de cada partida")
+    parser.add_argument("--min-weight", type=int, default=1, help="peso mínimo de una jugada para guardarla")
+    args = parser.parse_args(argv)
+
+    weights = {}
+    for path in args.games:
+        if path.endswith(".pgn"):
+            add_pgn(weights, path, args.plies)
+        else:
+            add_selfplay(weights, path, args.plies)
+
+    weights = {key: weight for key, weight in weights.items() if weight >= args.min_weight}
+    records = write_book(args.output, weights)
+    positions = len({key for key, _ in weights})
+    print(f"{records} jugadas de {positions} posiciones en {args.output} "
+          f"({os.path.getsize(args.output)} bytes)", file=sys.stderr)
+
+    book = OpeningBook(args.output)
+    first, first_total, second, second_total = coverage(book)
+    book.close()
+    print(f"respuestas a {first} de {first_total} primeras jugadas de las blancas y a {second} de "
+          f"{second_total} segundas jugadas (sin capturas)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import drops
+
+from utils import PIECE_VALUES, POSITION_VALUES
+
+# ============================================================
+#                 CACHÉ PERSISTENTE DE ANÁLISIS
+# ============================================================
+
+# Versión del formato de la caché. Si cambia, se descartan todas las entradas.
+CACHE_FORMAT = 1
+
+# Entradas como máximo; al superarlo se eliminan las que hace más tiempo que
+# no se usan.
+MAX_ENTRIES = 1_000_000
+
+# Días tras los que se elimina una entrada que no se ha vuelto a usar (None
+# para no eliminar por antigüedad).
+MAX_AGE_DAYS = 30
+
+# Cada cuántas escrituras de un proceso se aplican el tamaño máximo y la antigüedad.
+EVICT_INTERVAL = 1000
+
+# Segundos entre dos actualizaciones de la fecha de uso de una misma entrada
+# al leerla; así las lecturas frecuentes no escriben en cada acierto.
+TOUCH_INTERVAL = 3600
+
+# Milisegundos que un proceso espera a que otro libere la base de datos
+# antes de dar la operación por fallida.
+BUSY_TIMEOUT = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    key INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    used INTEGER NOT NULL,
+    UNIQUE (key, depth, version)
+);
+CREATE INDEX IF NOT EXISTS analysis_used ON analysis (used);
+"""
+
+
+def tables_digest():
+    """
+    Devuelve un resumen de las tablas de valores de la evaluación
+    (PIECE_VALUES y POSITION_VALUES) y de las de la elección de casillas de
+    colocación (drops). Si alguna cambia, cambia el resumen y las entradas
+    guardadas con las tablas anteriores dejan de valer.
+    """
+    tables = (CACHE_FORMAT, sorted(PIECE_VALUES.items()), sorted(POSITION_VALUES.items()),
+              drops.THREAT_VALUES, drops.MOBILITY_VALUE, drops.MATERIAL_VALUES)
+    return hashlib.sha1(repr(tables).encode()).hexdigest()[:16]
+
+
+class AnalysisCache:
+    """
+    Resultados de machine_move y put_piece guardados en disco (SQLite) para
+    reutilizarlos entre partidas y entre procesos. Cada entrada se identifica
+    por el hash de Zobrist de la posición, la profundidad de la búsqueda y la
+    versión (las tablas de valores y los parámetros de la búsqueda), y guarda
+    la jugada codificada como en la tabla de transposiciones. La base de
+    datos usa el modo WAL, de modo que muchos procesos pueden leer y escribir
+    a la vez; cada proceso (y cada hilo) abre su propia conexión. Un error de
+    la base de datos nunca detiene la búsqueda: la consulta falla como si la
+    posición no estuviera.
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        """
+        Abre (o crea) la caché y descarta las entradas calculadas con otras
+        tablas de valores.
+
+            path : archivo de la base de datos.
+            max_entries : número máximo de entradas.
+            max_age_days : días sin usarse tras los que se elimina una entrada
+                           (None para no eliminar por antigüedad).
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.digest = tables_digest()
+        self.local = threading.local()
+        self.settings = None
+        self.version = None
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        connection = self.connection()
+        connection.executescript(SCHEMA)
+        connection.execute("DELETE FROM analysis WHERE substr(version, 1, 16) != ?", (self.digest,))
+
+
+    def connection(self):
+        """
+        Devuelve la conexión de este proceso e hilo, y la abre si aún no existe
+        (las conexiones de SQLite no se pueden compartir entre procesos).
+        """
+        local = self.local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT / 1000, isolation_level=None)
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.pid = os.getpid()
+
+        return local.connection
+
+
+    def version_of(self, settings):
+        """
+        Devuelve la versión de las entradas para unos parámetros de búsqueda:
+        el resumen de las tablas de valores seguido del de los parámetros.
+
+            settings : parámetros de la búsqueda (parallel.current_settings()).
+        """
+        if settings != self.settings:
+            self.settings = dict(settings)
+            digest = hashlib.sha1(repr(sorted(settings.items())).encode()).hexdigest()[:16]
+            self.version = f"{self.digest}:{digest}"
+
+        return self.version
+
+
+    def get(self, key, depth, settings):
+        """
+        Devuelve la jugada codificada guardada para una posición, o None si
+        no está.
+
+            key : hash de Zobrist de la posición (entero de 64 bits sin signo).
+            depth : profundidad de la búsqueda.
+            settings : parámetros de la búsqueda.
+        """
+        key = signed(key)
+        version = self.version_of(settings)
+        now = int(time.time())
+
+        try:
+            connection = self.connection()
+            row = connection.execute("SELECT value, used FROM analysis WHERE key = ? AND depth = ? AND version = ?",
+                                     (key, depth, version)).fetchone()
+            if row is not None and now - row[1] >= TOUCH_INTERVAL:
+                connection.execute("UPDATE analysis SET used = ? WHERE key = ? AND depth = ? AND version = ?",
+                                   (now, key, depth, version))
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[0]
+
+
+    def put(self, key, depth, settings, value):
+        """
+        Guarda la jugada codificada de una posición.
+
+            key : hash de Zobrist de la posición (entero de 64 bits sin signo).
+            depth : profundidad de la búsqueda.
+            settings : parámetros de la búsqueda.
+            value : jugada codificada (encode_move o encode_drop).
+        """
+        try:
+            connection = self.connection()
+            connection.execute("INSERT OR REPLACE INTO analysis (key, depth, version, value, used) VALUES (?, ?, ?, ?, ?)",
+                               (signed(key), depth, self.version_of(settings), value, int(time.time())))
+            self.writes += 1
+            if not self.writes % EVICT_INTERVAL:
+                self.evict()
+        except sqlite3.Error:
+            self.errors += 1
+
+
+    def evict(self):
+        """
+        Elimina las entradas más antiguas que MAX_AGE_DAYS y, si aún sobran,
+        las que hace más tiempo que no se usan hasta dejar max_entries.
+        """
+        connection = self.connection()
+        if self.max_age_days is not None:
+            connection.execute("DELETE FROM analysis WHERE used < ?",
+                               (int(time.time() - self.max_age_days * 86400),))
+
+        excess = connection.execute("SELECT COUNT(*) FROM analysis").fetchone()[0] - self.max_entries
+        if excess > 0:
+            connection.execute("DELETE FROM analysis WHERE rowid IN "
+                               "(SELECT rowid FROM analysis ORDER BY used LIMIT ?)", (excess,))
+
+
+    def __len__(self):
+        return self.connection().execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+
+
+    def stats(self):
+        """
+        Devuelve los contadores de la caché en este proceso.
+        """
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "errors": self.errors}
+
+
+def signed(key):
+    """
+    Convierte un hash de 64 bits sin signo en el entero con signo que guarda SQLite.
+
+        key : hash de Zobrist.
+    """
+    return key - (1 << 64) if key >= 1 << 63 else key
@@ -0,0 +1,119 @@
+import chess
+
+# ============================================================
+#              CASILLAS CANDIDATAS PARA COLOCAR FICHAS
+# ============================================================
+
+# Casillas atacadas desde cada casilla por las piezas que no se deslizan,
+# indexadas como STEP_ATTACKS[color][tipo de pieza][casilla]. Los alfiles, las
+# torres y las damas dependen de las piezas que las bloquean y se calculan con
+# las tablas de ataques deslizantes de python-chess.
+STEP_ATTACKS = [[None] * 7, [None] * 7]
+for _color in chess.COLORS:
+    STEP_ATTACKS[_color][chess.PAWN] = chess.BB_PAWN_ATTACKS[_color]
+    STEP_ATTACKS[_color][chess.KNIGHT] = chess.BB_KNIGHT_ATTACKS
+    STEP_ATTACKS[_color][chess.KING] = chess.BB_KING_ATTACKS
+
+# Valor de amenazar cada tipo de pieza rival. Amenazar al rey es dar jaque.
+THREAT_VALUES = [0, 5, 15, 15, 25, 45, 40]
+
+# Puntos por cada casilla atacada por la pieza colocada.
+MOBILITY_VALUE = 1
+
+# Valor absoluto de cada tipo de pieza, para penalizar las casillas donde la
+# pieza colocada quedaría colgando.
+MATERIAL_VALUES = [0, 10, 30, 30, 50, 90, 900]
+
+
+def drop_attacks(piece, square, occupied):
+    """
+    Devuelve la máscara de casillas que atacaría una pieza colocada en una
+    casilla.
+
+        piece : pieza (chess.Piece) que se coloca.
+        square : casilla donde se coloca la pieza.
+        occupied : máscara de casillas ocupadas del tablero.
+    """
+    piece_type = piece.piece_type
+    step = STEP_ATTACKS[piece.color][piece_type]
+    if step is not None:
+        return step[square]
+
+    attacks = 0
+    if piece_type != chess.ROOK:
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type != chess.BISHOP:
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+                    | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+
+    return attacks
+
+
+def attack_map(board, color):
+    """
+    Devuelve la máscara de casillas atacadas por las piezas de un color.
+
+        board : estado del tablero.
+        color : color de las piezas atacantes.
+    """
+    attacks = 0
+    for square in chess.scan_forward(board.occupied_co[color]):
+        attacks |= board.attacks_mask(square)
+
+    return attacks
+
+
+def drop_candidates(board, piece, values, limit=None, margin=None):
+    """
+    Devuelve las casillas vacías donde conviene colocar una pieza, de la más a
+    la menos prometedora para quien la coloca. Cada casilla se puntúa con su
+    valor en la tabla de la pieza, las piezas rivales que atacaría (y las
+    casillas que controlaría) y una penalización si la pieza quedaría colgando:
+    atacada y sin defender, o atacada por un peón rival.
+
+        board : estado del tablero.
+        piece : pieza (chess.Piece) que se coloca.
+        values : valor de la pieza en cada casilla (puntuación absoluta, con
+                 las negras en positivo).
+        limit : número máximo de casillas a devolver (None para no limitar).
+        margin : diferencia máxima de puntuación con la mejor casilla (None
+                 para no limitar).
+    """
+    color = piece.color
+    occupied = board.occupied
+    enemies = board.occupied_co[not color]
+    own_attacks = attack_map(board, color)
+    enemy_attacks = attack_map(board, not color)
+    enemy_pawn_attacks = 0
+    for square in chess.scan_forward(board.pawns & enemies):
+        enemy_pawn_attacks |= chess.BB_PAWN_ATTACKS[not color][square]
+
+    sign = 1 if color == chess.BLACK else -1
+    material = MATERIAL_VALUES[piece.piece_type]
+    pawn_loss = material - MATERIAL_VALUES[chess.PAWN]
+    piece_type_at = board.piece_type_at
+    ranked = []
+
+    for square in chess.scan_forward(~occupied & chess.BB_ALL):
+        attacks = drop_attacks(piece, square, occupied)
+        value = sign * values[square] + MOBILITY_VALUE * chess.popcount(attacks)
+
+        for target in chess.scan_forward(attacks & enemies):
+            value += THREAT_VALUES[piece_type_at(target)]
+
+        mask = chess.BB_SQUARES[square]
+        if mask & enemy_attacks:
+            if not mask & own_attacks:
+                value -= material
+            elif mask & enemy_pawn_attacks:
+                value -= pawn_loss
+
+        ranked.append((value, square))
+
+    ranked.sort(reverse=True)
+
+    if margin is not None and ranked:
+        lowest = ranked[0][0] - margin
+        ranked = [entry for entry in ranked if entry[0] >= lowest]
+
+    return [square for value, square in ranked[:limit]]
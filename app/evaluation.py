@@ -0,0 +1,201 @@
+import chess
+
+from utils import PIECE_VALUES, POSITION_VALUES
+
+# NumPy es opcional: sin él, la búsqueda evalúa cada hoja por separado. Se
+# importa la primera vez que se usa (ver load()), ya que tarda más en
+# importarse que el resto del motor y la evaluación en bloque está desactivada
+# por defecto.
+np = None
+_loaded = False
+
+# ============================================================
+#                 EVALUACIÓN VECTORIZADA
+# ============================================================
+
+# Orden de las 12 filas de PIECE_TABLE: peón, caballo, alfil, torre, dama y rey
+# blancos, y después los mismos tipos negros.
+PIECES = [chess.Piece(piece_type, color) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+
+# Cuántos tableros se evalúan a la vez en evaluate_masks, para acotar la
+# memoria de las máscaras desempaquetadas (768 bytes por tablero).
+CHUNK_SIZE = 1 << 16
+
+# Tablas de la evaluación vectorizada; las construye load().
+PIECE_TABLE = None
+COLOR_TABLE = None
+PIECE_TYPE_COLUMN = None
+
+
+def load():
+    """
+    Importa NumPy y construye las tablas la primera vez que se llama. Indica
+    si NumPy está instalado.
+    """
+    global np, _loaded, PIECE_TABLE, COLOR_TABLE, PIECE_TYPE_COLUMN
+
+    if _loaded:
+        return np is not None
+    _loaded = True
+
+    try:
+        import numpy
+    except ImportError:
+        return False
+    np = numpy
+
+    # Valor (pieza + posición) de cada pieza en cada casilla, con forma (12, 64).
+    PIECE_TABLE = np.array([
+        [PIECE_VALUES[piece.symbol()] + POSITION_VALUES[piece.symbol()][square // 8][square % 8]
+         for square in chess.SQUARES]
+        for piece in PIECES
+    ], dtype=np.int32)
+
+    # La misma tabla indexada como COLOR_TABLE[color][tipo de pieza][casilla],
+    # igual que PIECE_SQUARE_VALUES en AI.py, con una fila de ceros para el
+    # tipo 0 (sin pieza). El color se convierte a entero, ya que NumPy toma
+    # los índices booleanos como máscaras.
+    COLOR_TABLE = np.zeros((2, 7, 64), dtype=np.int64)
+    COLOR_TABLE[int(chess.WHITE), 1:] = PIECE_TABLE[:6]
+    COLOR_TABLE[int(chess.BLACK), 1:] = PIECE_TABLE[6:]
+
+    # Tipo de pieza de cada fila de las máscaras desempaquetadas de un color.
+    PIECE_TYPE_COLUMN = np.arange(1, 7, dtype=np.int64)[:, None]
+
+    return True
+
+
+def available():
+    """
+    Indica si NumPy está instalado y se puede usar la evaluación vectorizada
+    (lo importa si aún no se hizo). Las demás funciones del módulo requieren
+    haberlo comprobado antes.
+    """
+    return load()
+
+
+def board_masks(board):
+    """
+    Devuelve las 12 máscaras de piezas del tablero (board.pieces_mask) en el
+    orden de PIECE_TABLE, como arreglo de enteros sin signo de 64 bits.
+
+        board : estado del tablero.
+    """
+    return np.array([board.pieces_mask(piece.piece_type, piece.color) for piece in PIECES], dtype=np.uint64)
+
+
+def unpack_masks(masks):
+    """
+    Desempaqueta máscaras de 64 bits en un bit por casilla. Un arreglo con
+    forma (..., 12) se convierte en uno con forma (..., 12, 64) de ceros y unos.
+
+        masks : arreglo de máscaras (np.uint64).
+    """
+    masks = np.ascontiguousarray(masks, dtype='<u8')
+    bits = np.unpackbits(masks.view(np.uint8), axis=-1, bitorder='little')
+
+    return bits.reshape(masks.shape + (64,))
+
+
+def evaluate_masks(masks):
+    """
+    Evalúa N posiciones a la vez. Devuelve un arreglo con la puntuación de
+    cada una, igual a la de evaluate_position en AI.py.
+
+        masks : arreglo con forma (N, 12) de máscaras de piezas (np.uint64).
+    """
+    masks = np.asarray(masks, dtype=np.uint64).reshape(-1, len(PIECES))
+    table = PIECE_TABLE.reshape(-1)
+    scores = np.empty(len(masks), dtype=np.int64)
+
+    for start in range(0, len(masks), CHUNK_SIZE):
+        bits = unpack_masks(masks[start:start + CHUNK_SIZE])
+        scores[start:start + CHUNK_SIZE] = bits.reshape(len(bits), -1) @ table
+
+    return scores
+
+
+def evaluate_boards(boards):
+    """
+    Evalúa una lista de tableros en una sola llamada.
+
+        boards : tableros (chess.Board) a evaluar.
+    """
+    masks = np.array([[board.pieces_mask(piece.piece_type, piece.color) for piece in PIECES] for board in boards],
+                     dtype=np.uint64)
+
+    return evaluate_masks(masks)
+
+
+def evaluate_board(board):
+    """
+    Evalúa un solo tablero con la tabla vectorizada.
+
+        board : estado del tablero.
+    """
+    return int(evaluate_masks(board_masks(board)[None])[0])
+
+
+def leaf_scores(board, moves, score):
+    """
+    Calcula de una vez la puntuación de todos los hijos de un nodo de la
+    frontera de la búsqueda, es decir, de todas las hojas hermanas. Equivale a
+    sumar AI.move_delta a la puntuación de cada movimiento y, si captura, el
+    valor de colocar la ficha en su mejor casilla, como hace la búsqueda en
+    las hojas.
+
+        board : estado del tablero antes de los movimientos.
+        moves : lista de movimientos (chess.Move) del jugador que mueve.
+        score : puntuación del tablero.
+    """
+    color = board.turn
+    own = COLOR_TABLE[int(color)]
+    other = COLOR_TABLE[int(not color)]
+
+    # Tipo de pieza que ocupa cada casilla (0 si está vacía).
+    bits = unpack_masks(board_masks(board)).astype(np.int64)
+    types = ((bits[:6] + bits[6:]) * PIECE_TYPE_COLUMN).sum(axis=0)
+
+    count = len(moves)
+    from_squares = np.fromiter((move.from_square for move in moves), np.int64, count)
+    to_squares = np.fromiter((move.to_square for move in moves), np.int64, count)
+    promotions = np.fromiter((move.promotion or 0 for move in moves), np.int64, count)
+
+    pieces = types[from_squares]
+    captured = types[to_squares]
+    arrived = np.where(promotions > 0, promotions, pieces)
+
+    # La pieza sale de su casilla, llega a la de destino y se retira la capturada.
+    values = score + own[arrived, to_squares] - own[pieces, from_squares] - other[captured, to_squares]
+
+    # Captura al paso: el peón capturado está detrás de la casilla de destino.
+    en_passant = (pieces == chess.PAWN) & (captured == 0) & ((to_squares - from_squares) % 8 != 0)
+    behind = to_squares ^ 8
+    if en_passant.any():
+        values -= np.where(en_passant, other[chess.PAWN, behind], 0)
+        captured = np.where(en_passant, chess.PAWN, captured)
+
+    # Enroque: la torre pasa de la esquina a la casilla junto al rey.
+    castling = (pieces == chess.KING) & (np.abs(to_squares - from_squares) == 2)
+    if castling.any():
+        rank = from_squares - from_squares % 8
+        kingside = to_squares > from_squares
+        rook_from = np.where(kingside, rank + 7, rank)
+        rook_to = np.where(kingside, rank + 5, rank + 3)
+        values += np.where(castling, own[chess.ROOK, rook_to] - own[chess.ROOK, rook_from], 0)
+
+    # Colocación tras la captura: la mejor casilla entre las vacías, la casilla
+    # de salida y, en la captura al paso, la del peón capturado.
+    capture = captured > 0
+    if capture.any():
+        empty = (bits.sum(axis=0) == 0)
+        better = np.maximum if color == chess.BLACK else np.minimum
+        worst = np.iinfo(np.int64).min if color == chess.BLACK else np.iinfo(np.int64).max
+        best_empty = np.where(empty, own, worst)
+        best_empty = best_empty.max(axis=1) if color == chess.BLACK else best_empty.min(axis=1)
+
+        drop = better(best_empty[captured], own[captured, from_squares])
+        drop = np.where(en_passant, better(drop, own[captured, behind]), drop)
+        values += np.where(capture, drop, 0)
+
+    return values
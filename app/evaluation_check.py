@@ -0,0 +1,132 @@
+import argparse
+import random
+import sys
+
+import chess
+
+import AI
+
+from bitboard import Position
+from utils import PIECE_VALUES, POSITION_VALUES
+
+# ============================================================
+#             EVALUACIÓN INCREMENTAL CONTRA COMPLETA
+# ============================================================
+
+# Partidas al azar que se recorren, jugadas (medias) como máximo de cada una
+# y semilla con que se generan.
+RANDOM_GAMES = 100
+RANDOM_PLIES = 60
+RANDOM_SEED = 1
+
+
+def reference_evaluation(board):
+    """
+    Evaluación recorriendo las 64 casillas del tablero con PIECE_VALUES y
+    POSITION_VALUES, como la hacía el motor antes de la evaluación
+    incremental.
+
+        board : estado del tablero.
+    """
+    value = 0
+
+    for i in range(8):
+        for j in range(8):
+            piece = board.piece_at(i * 8 + j)
+            if piece is not None:
+                symbol = piece.symbol()
+                value += PIECE_VALUES[symbol] + POSITION_VALUES[symbol][i][j]
+
+    return value
+
+
+def check_game(rng, plies):
+    """
+    Juega una partida al azar con las reglas de la variante (quien captura
+    coloca la ficha con su color en una casilla vacía al azar) y compara en
+    cada posición evaluate_position con la evaluación completa, y en cada
+    jugada legal y cada colocación la puntuación incremental (move_delta y
+    drop_delta). Devuelve las posiciones y actualizaciones comprobadas y la
+    lista de diferencias (FEN, comprobación, valor incremental, valor
+    completo).
+
+        rng : generador de números aleatorios.
+        plies : jugadas (medias) como máximo de la partida.
+    """
+    board = chess.Board()
+    positions = updates = 0
+    mismatches = []
+
+    for _ in range(plies):
+        score = reference_evaluation(board)
+        positions += 1
+        for label, value in (("evaluate_position", AI.evaluate_position(board)),
+                             ("evaluate_position (Position)", AI.evaluate_position(Position(board)))):
+            if value != score:
+                mismatches.append((board.fen(), label, value, score))
+
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+
+        # Se comprueban todas las jugadas legales, no solo la que se juega.
+        for move in moves:
+            delta = AI.move_delta(board, move)
+            board.push(move)
+            updates += 1
+            expected = reference_evaluation(board)
+            board.pop()
+            if score + delta != expected:
+                mismatches.append((board.fen(), f"move_delta {move.uci()}", score + delta, expected))
+
+        move = rng.choice(moves)
+        captured = AI.captured_piece_type(board, move)
+        board.push(move)
+
+        if captured:
+            score = reference_evaluation(board)
+            piece = chess.Piece(captured, not board.turn)
+            square = rng.choice(list(chess.scan_reversed(~board.occupied & chess.BB_ALL)))
+            board.set_piece_at(square, piece)
+            updates += 1
+            expected = reference_evaluation(board)
+            if score + AI.drop_delta(piece, square) != expected:
+                mismatches.append((board.fen(), f"drop_delta {piece.symbol()}@{chess.square_name(square)}",
+                                   score + AI.drop_delta(piece, square), expected))
+
+    return positions, updates, mismatches
+
+
+def main(argv=None):
+    """
+    Comprueba que la evaluación incremental (evaluate_position, move_delta y
+    drop_delta) da la misma puntuación que recorrer las 64 casillas con
+    PIECE_VALUES y POSITION_VALUES, en posiciones de partidas al azar.
+    Termina con código 1 si hay alguna diferencia.
+    """
+    parser = argparse.ArgumentParser(description="Compara la evaluación incremental con la evaluación completa.")
+    parser.add_argument("-n", "--games", type=int, default=RANDOM_GAMES, help="partidas al azar")
+    parser.add_argument("--plies", type=int, default=RANDOM_PLIES, help="jugadas como máximo de cada partida")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="semilla de las partidas al azar")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    positions = updates = 0
+    mismatches = []
+    for _ in range(args.games):
+        game_positions, game_updates, game_mismatches = check_game(rng, args.plies)
+        positions += game_positions
+        updates += game_updates
+        mismatches += game_mismatches
+
+    for fen, label, value, expected in mismatches:
+        print(f"{fen} ({label}): {value}, evaluación completa {expected}")
+
+    print(f"evaluación: {positions} posiciones y {updates} actualizaciones, "
+          f"{len(mismatches)} diferencias con la evaluación completa")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
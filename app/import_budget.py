@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+# ============================================================
+#                 PRESUPUESTO DE IMPORTACIÓN DEL MOTOR
+# ============================================================
+
+# Módulos del motor, que deben poder importarse sin abrir ninguna ventana.
+ENGINE_MODULES = ("AI", "background", "bitboard", "drops", "evaluation", "limits", "ordering",
+                  "parallel", "stats", "transposition", "utils")
+
+# Módulos que importar el motor no debe cargar: la interfaz y las dependencias
+# que solo se cargan al usarse (NumPy y el grupo de procesos).
+FORBIDDEN_MODULES = ("pygame", "numpy", "concurrent.futures")
+
+# Tiempo máximo (en milisegundos) para importar el motor en un intérprete nuevo.
+IMPORT_BUDGET_MS = 250
+
+# Veces que se mide la importación; se toma la más rápida.
+REPEAT = 5
+
+# Programa que se ejecuta en cada intérprete nuevo: importa el motor y
+# devuelve el tiempo empleado y los módulos prohibidos que se cargaron.
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps([elapsed, [name for name in {forbidden!r} if name in sys.modules]]))
+"""
+
+
+def measure():
+    """
+    Importa el motor en un intérprete nuevo y devuelve los milisegundos que
+    tardó y la lista de módulos prohibidos que se cargaron.
+    """
+    app = os.path.dirname(os.path.abspath(__file__))
+    code = PROBE.format(modules=ENGINE_MODULES, forbidden=FORBIDDEN_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], cwd=app, check=True,
+                            capture_output=True, text=True).stdout
+
+    elapsed, loaded = json.loads(output.splitlines()[-1])
+    return elapsed, loaded
+
+
+def main():
+    """
+    Mide la importación del motor REPEAT veces e indica si cumple el
+    presupuesto. Termina con código 1 si no lo cumple.
+    """
+    results = [measure() for _ in range(REPEAT)]
+    elapsed = min(result[0] for result in results)
+    loaded = sorted({name for result in results for name in result[1]})
+
+    print(f"Importación del motor: {elapsed:.1f} ms (presupuesto {IMPORT_BUDGET_MS} ms)")
+    if loaded:
+        print(f"Módulos que no debería cargar: {', '.join(loaded)}")
+
+    if elapsed > IMPORT_BUDGET_MS or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import math
+import time
+
+# ============================================================
+#                 LÍMITES DE LA BÚSQUEDA
+# ============================================================
+
+class SearchAborted(Exception):
+    """
+    Se lanza dentro de la búsqueda cuando se agota el tiempo o los nodos, o
+    cuando se pide detenerla. La atrapa el bucle de profundización iterativa.
+    """
+
+
+class SearchLimits:
+    """
+    Presupuesto de una búsqueda: tiempo máximo en milisegundos y número máximo
+    de nodos. Cada nodo de la búsqueda llama a check(), que lanza SearchAborted
+    cuando se supera alguno de los límites. También guarda la profundidad de la
+    iteración en curso, para mostrar el progreso mientras se busca.
+    """
+
+    # Cada cuántos nodos se consulta el reloj.
+    CLOCK_INTERVAL = 256
+
+    def __init__(self):
+        self.start()
+
+
+    def start(self, movetime=None, nodes=None):
+        """
+        Reinicia el contador de nodos y fija los límites de una nueva búsqueda.
+
+            movetime : tiempo máximo en milisegundos (None para no limitar).
+            nodes : número máximo de nodos (None para no limitar).
+        """
+        self.started = time.perf_counter()
+        self.deadline = self.started + movetime / 1000 if movetime is not None else math.inf
+        self.max_nodes = nodes if nodes is not None else math.inf
+        self.nodes = 0
+        self.depth = 0
+        self.stopped = False
+
+
+    def stop(self):
+        """
+        Pide detener la búsqueda en curso lo antes posible.
+        """
+        self.stopped = True
+
+
+    def check(self):
+        """
+        Cuenta un nodo y lanza SearchAborted si se ha superado el presupuesto.
+        """
+        self.nodes += 1
+
+        if self.nodes >= self.max_nodes or self.stopped:
+            raise SearchAborted()
+
+        if not self.nodes % self.CLOCK_INTERVAL:
+            self.poll()
+
+
+    def count(self, nodes):
+        """
+        Cuenta varios nodos de una vez (por ejemplo, hojas evaluadas en bloque)
+        y lanza SearchAborted si se ha superado el presupuesto.
+
+            nodes : número de nodos a contar.
+        """
+        previous = self.nodes
+        self.nodes += nodes
+
+        if self.nodes >= self.max_nodes or self.stopped:
+            raise SearchAborted()
+
+        if self.nodes // self.CLOCK_INTERVAL != previous // self.CLOCK_INTERVAL:
+            self.poll()
+
+
+    def poll(self):
+        """
+        Consulta el reloj y lanza SearchAborted si se acabó el tiempo. Se llama
+        cada CLOCK_INTERVAL nodos.
+        """
+        if time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+
+
+    def elapsed(self):
+        """
+        Devuelve los milisegundos transcurridos desde el inicio de la búsqueda.
+        """
+        return (time.perf_counter() - self.started) * 1000
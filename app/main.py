@@ -1,26 +1,61 @@
+import os
 import pygame
 import sys
+import time
 import chess
 import math
 
-from AI import machine_move, put_piece
+import AI
+
+from AI import captured_piece_type
+from background import BackgroundSearch
+from book import OpeningBook
+from cache import AnalysisCache
+from profiler import OVERLAY_POSITION, FrameProfiler
 from utils import PIECE_IMAGES
 
 
 
 # Inicializamos el tablero de ajedrez.
 board = chess.Board()
-pygame.font.init()
 
 # Definimos el ancho de la ventana.
 WIDTH = 650
 PADDING = 80
 
-# Creamos una ventana con el ancho y alto definidos.
-WIN = pygame.display.set_mode((WIDTH + PADDING, WIDTH +PADDING))
+# Tiempo máximo (en milisegundos) que la IA puede pensar cada decisión.
+AI_MOVETIME = 5000
+
+# Procesos con los que la IA reparte su búsqueda (1 para buscar en serie). La
+# jugada elegida es la misma con cualquier número de procesos.
+AI_WORKERS = 1
+
+# Indica si la IA piensa durante el turno del jugador (en este proceso).
+AI_PONDER = True
+
+# Libro de aperturas de la IA (se usa si el archivo existe; cómo se construye
+# está en book.py, o None para no usarlo) y si elige al azar entre sus
+# jugadas según su peso. Sin elegir al azar juega siempre la de mayor peso,
+# así que la apertura de la IA sigue siendo determinista.
+AI_BOOK = 'app/book.bin'
+AI_BOOK_RANDOM = False
 
-# Establecemos el título de la ventana del programa.
-pygame.display.set_caption("Crazy Chess")
+# Caché persistente de análisis de la IA (archivo SQLite, por ejemplo
+# 'app/analysis.sqlite'), o None para no usarla.
+AI_CACHE = None
+
+# Cuadros por segundo del bucle principal. Entre cuadros el bucle duerme y deja
+# el procesador al hilo en el que piensa la IA.
+FRAME_RATE = 30
+
+# Medición de la interfaz (profiler.FrameProfiler), o None si no se mide. Se
+# activa al arrancar con --profile (o --profile=traza.json); la traza se
+# escribe en PROFILE_TRACE al cerrar la ventana o al pulsar F2.
+PROFILER = None
+PROFILE_TRACE = "gui_profile.csv"
+
+# Ventana del juego; la crea init_display() al arrancar la interfaz.
+WIN = None
 
 # Establecemos los colores RGB
 WHITE = (238, 238, 211)
@@ -30,10 +65,66 @@ YELLOW = (255, 218, 33, 100)
 BLUE = (50, 255, 255)
 BLACK = (0, 0, 0)
 
-font_name = pygame.font.get_default_font()
 font_path = 'app/fuentes/BebasNeue-Regular.otf'
-font = pygame.font.Font(font_path, 21)
-font2 = pygame.font.Font(font_path, 22)
+
+# Fuentes del texto; las carga init_display().
+font = None
+font2 = None
+
+class SpriteCache:
+    """
+    Imágenes de las piezas, cargadas del disco una sola vez y escaladas al
+    tamaño de las casillas. Si cambia el tamaño, se vuelven a escalar a partir
+    de las imágenes originales, sin leerlas de nuevo.
+    """
+
+    def __init__(self, images):
+        """
+        Inicializa la caché.
+
+            images : diccionario con la ruta de la imagen de cada pieza, por su símbolo.
+        """
+        self.images = images
+        self.originals = {}
+        self.scaled = {}
+        self.size = None
+
+
+    def load(self, size):
+        """
+        Carga y escala todas las imágenes. Requiere que la ventana ya exista,
+        ya que convert_alpha() adapta cada imagen al formato de la pantalla.
+
+            size : lado de una casilla en píxeles.
+        """
+        for symbol in self.images:
+            self.get(symbol, size)
+
+
+    def get(self, symbol, size):
+        """
+        Devuelve la imagen de una pieza escalada al tamaño de casilla dado.
+
+            symbol : símbolo de la pieza (por ejemplo, 'P' o 'k').
+            size : lado de una casilla en píxeles.
+        """
+        if size != self.size:
+            self.scaled = {}
+            self.size = size
+
+        sprite = self.scaled.get(symbol)
+        if sprite is None:
+            original = self.originals.get(symbol)
+            if original is None:
+                original = pygame.image.load(self.images[symbol]).convert_alpha()
+                self.originals[symbol] = original
+            sprite = pygame.transform.smoothscale(original, (size, size))
+            self.scaled[symbol] = sprite
+
+        return sprite
+
+# Imágenes de las piezas; init_display() las carga al tamaño de las casillas.
+SPRITES = SpriteCache(PIECE_IMAGES)
 
 class Node:
     """
@@ -50,6 +141,7 @@ class Node:
         """
         self.row = row
         self.col = col
+        self.width = width
         self.x = int(col * width) + PADDING / 2
         self.y = int(row * width) + PADDING / 2
         self.colour = WHITE
@@ -66,25 +158,30 @@ class Node:
             
         """
         if self.selected:
-            pygame.draw.rect(window, YELLOW, (self.x, self.y, (WIDTH / 8), (WIDTH / 8)))
+            pygame.draw.rect(window, YELLOW, (self.x, self.y, self.width, self.width))
         elif self.posible:
-            pygame.draw.circle(window, YELLOW,(self.x + ((WIDTH / 8)/2) , self.y + ((WIDTH / 8)/2)) , 15)
-        else : pygame.draw.rect(window, self.colour, (self.x, self.y, (WIDTH / 8),(WIDTH / 8) ))
+            pygame.draw.circle(window, YELLOW,(self.x + (self.width / 2) , self.y + (self.width / 2)) , 15)
+        else : pygame.draw.rect(window, self.colour, (self.x, self.y, self.width, self.width))
 
 
-    def setup(self, window, matrix):
+    def setup(self, window, symbol):
         """
-        Establece las fichas de ajedrez en el tablero de juego.
+        Establece la ficha de ajedrez de la celda en el tablero de juego.
 
             window: ventana de visualización.
-            matrix : matriz que representa el tablero de ajedrez.
+            symbol : símbolo de la pieza de la celda (None si está vacía).
         """
-        # Si la celda en la posición dada no está vacía, crea la imagen, la escala
-        # y la ubica en la posición correspondiente.
-        if matrix[self.row][self.col] != "None":
-            image = pygame.image.load(PIECE_IMAGES[matrix[self.row][self.col]])
-            scaled_image = pygame.transform.scale(image, (int(image.get_width() / 1.8), int(image.get_height() / 1.8)))
-            window.blit(scaled_image, (self.x, self.y))
+        # Si la celda no está vacía, toma la imagen de la pieza, ya escalada al
+        # tamaño de la casilla, y la ubica en su posición.
+        if symbol is not None:
+            window.blit(SPRITES.get(symbol, self.width), (self.x, self.y))
+
+
+    def rect(self):
+        """
+        Devuelve el rectángulo que ocupa la celda en la ventana.
+        """
+        return pygame.Rect(self.x, self.y, self.width, self.width)
 
 def draw_plane(window):
         """
@@ -123,6 +220,18 @@ def turn_text(window, TURN):
         text = font.render("Turno de las negras:  IA", True, YELLOW)
         window.blit(text, (240, 9))
 
+def thinking_text(window, progress):
+    """
+    Dibuja el indicador de que la IA está pensando, con la profundidad de la
+    iteración en curso y los nodos buscados.
+
+        window : ventana de visualización.
+        progress : tupla (profundidad, nodos) de la búsqueda.
+    """
+    depth, nodes = progress
+    text = font.render(f"Pensando:  prof. {depth}  |  {nodes} nodos", True, WHITE)
+    window.blit(text, (470, 9))
+
 def make_grid(size, width):
     """
     Devuelve una cuadrícula de nodos.
@@ -171,35 +280,163 @@ def draw_grid(window, size, width):
 
 
 
-def update_display(window, grid, rows, width, turn):
+class Renderer:
+    """
+    Dibuja la ventana del juego redibujando solo lo que cambia. La capa fija
+    (fondo, casillas y coordenadas) se dibuja una vez en una superficie aparte;
+    en cada llamada se compara lo que muestra cada casilla (pieza, selección y
+    movimiento posible) y el texto superior con lo último dibujado, se
+    restauran desde la capa fija solo las zonas que cambiaron y se actualizan
+    en pantalla solo esos rectángulos.
     """
-    Actualiza la ventana del tablero de ajedrez.
+
+    def __init__(self):
+        self.window = None
+        self.static = None
+        self.squares = {}
+        self.header = None
+        self.overlay = None
+
+
+    def invalidate(self):
+        """
+        Fuerza a redibujar toda la ventana en la siguiente llamada a draw().
+        """
+        self.static = None
+
+
+    def build(self, window, grid, rows, width):
+        """
+        Dibuja la capa fija en una superficie del tamaño de la ventana.
+
+            window : ventana de visualización.
+            grid : cuadrícula que representa el tablero de ajedrez.
+            rows : número de filas del tablero.
+            width : ancho total de la ventana de juego.
+        """
+        self.window = window
+        self.static = pygame.Surface(window.get_size()).convert()
+        self.squares = {}
+        self.header = None
+        self.overlay = None
+
+        draw_plane(self.static)
+        draw_letters_numbers(self.static)
+        for row in grid:
+            for spot in row:
+                pygame.draw.rect(self.static, spot.colour, spot.rect())
+        draw_grid(self.static, rows, width)
+
+
+    def draw(self, window, grid, rows, width, turn, progress=None):
+        """
+        Redibuja las zonas de la ventana que cambiaron y las actualiza en pantalla.
+
+            window : ventana de visualización.
+            grid : cuadrícula que representa el tablero de ajedrez.
+            rows : número de filas del tablero.
+            width : ancho total de la ventana de juego.
+            turn : turno que se muestra (0 jugador, 1 IA).
+            progress : progreso de la IA (profundidad, nodos) mientras piensa.
+        """
+        dirty = []
+
+        if self.static is None or window is not self.window:
+            self.build(window, grid, rows, width)
+            window.blit(self.static, (0, 0))
+            dirty.append(window.get_rect())
+
+        # Resumen de la medición de la interfaz: si cambió, se restaura lo que
+        # tapaba y se vuelve a dibujar encima.
+        overlay = PROFILER.overlay() if PROFILER is not None else None
+        overlay_dirty = overlay is not self.overlay
+        if overlay_dirty and self.overlay is not None:
+            rect = self.overlay.get_rect(topleft=OVERLAY_POSITION)
+            self.uncover(window, rect)
+            dirty.append(rect)
+        self.overlay = overlay
+        overlay_rect = overlay.get_rect(topleft=OVERLAY_POSITION) if overlay is not None else None
+
+        # Texto superior: turno y progreso de la IA.
+        header = (turn, progress)
+        if header != self.header:
+            self.header = header
+            rect = pygame.Rect(0, 0, window.get_width(), PADDING / 2)
+            window.blit(self.static, rect, rect)
+            turn_text(window, turn)
+            if progress is not None:
+                thinking_text(window, progress)
+            dirty.append(rect)
+
+        # Casillas cuyo contenido cambió desde el último dibujo.
+        pieces = board.piece_map()
+        for row in grid:
+            for spot in row:
+                piece = pieces.get(chess.square(spot.col, 7 - spot.row))
+                symbol = piece.symbol() if piece is not None else None
+                state = (symbol, spot.selected, spot.posible)
+                if self.squares.get(spot) == state:
+                    continue
+
+                self.squares[spot] = state
+                rect = spot.rect()
+                if PROFILER is not None:
+                    start = time.perf_counter()
+                window.blit(self.static, rect, rect)
+                if spot.selected or spot.posible:
+                    spot.draw(window)
+                spot.setup(window, symbol)
+                if PROFILER is not None:
+                    PROFILER.add("nodes", (time.perf_counter() - start) * 1000)
+                dirty.append(rect)
+                if overlay_rect is not None and rect.colliderect(overlay_rect):
+                    overlay_dirty = True
+
+        if overlay is not None and overlay_dirty:
+            window.blit(overlay, overlay_rect)
+            dirty.append(overlay_rect)
+
+        # Actualizamos en la ventana de juego solo las zonas que cambiaron.
+        if dirty:
+            pygame.display.update(dirty)
+
+
+    def uncover(self, window, rect):
+        """
+        Restaura una zona de la ventana desde la capa fija y olvida lo que se
+        dibujó en ella, para que se vuelva a dibujar en esta misma llamada.
+
+            window : ventana de visualización.
+            rect : zona de la ventana.
+        """
+        window.blit(self.static, rect, rect)
+        self.squares = {spot: state for spot, state in self.squares.items() if not spot.rect().colliderect(rect)}
+        if rect.top < PADDING / 2:
+            self.header = None
+
+# Dibujante de la ventana, que recuerda lo último que se mostró.
+RENDERER = Renderer()
+
+
+def update_display(window, grid, rows, width, turn, progress=None):
+    """
+    Actualiza la ventana del tablero de ajedrez. Solo se redibuja lo que
+    cambió desde la última actualización (ver Renderer).
 
         window : ventana de visualización.
         grid : cuadrícula que representa el tablero de ajedrez.
         rows : número de filas del tablero.
         width : ancho total de la ventana de juego.
+        turn : turno que se muestra (0 jugador, 1 IA).
+        progress : progreso de la IA (profundidad, nodos) mientras piensa.
     """
-    matrix = []
-    draw_plane(window)
-    turn_text(window, turn)
-    draw_letters_numbers(window)
-    # Recorremos el tablero y guardamos cada tipo de pieza en la matriz.
-    for i in range(8):
-        arr = [str(board.piece_at(chess.Square((i * 8 + j)))) for j in range(8)]
-        matrix.insert(0, arr)
-
-    # Recorremos de nuevo la cuadrícula y dibujamos cada nodo.
-    for row in grid:
-        for spot in row:
-            spot.draw(window)
-            spot.setup(window, matrix)
+    if PROFILER is None:
+        RENDERER.draw(window, grid, rows, width, turn, progress)
+        return
 
-    # Dibujamos las líneas de la cuadrícula.
-    draw_grid(window, rows, width)
-
-    # Actualizamos la ventana de juego para mostrar los cambios hechos.
-    pygame.display.update()
+    start = time.perf_counter()
+    RENDERER.draw(window, grid, rows, width, turn, progress)
+    PROFILER.add("update_display", (time.perf_counter() - start) * 1000)
 
 
 
@@ -227,7 +464,12 @@ def find_node(pos, width,grid):
 
     # Obtenemos la posicíon del nodo en la notación del ajedrez.
     pos = "" + ['a','b','c','d','e','f','g','h'][x] + f"{8 - y}"
-    find_legal_moves(board, pos, grid)
+    if PROFILER is None:
+        find_legal_moves(board, pos, grid)
+    else:
+        start = time.perf_counter()
+        find_legal_moves(board, pos, grid)
+        PROFILER.add("find_legal_moves", (time.perf_counter() - start) * 1000)
     return pos
 
 def find_legal_moves(board, pos,grid):
@@ -275,13 +517,49 @@ def main(window, width,grid):
     # Creamos la cuadrícula del tablero de ajedrez.
     grid = make_grid(8, width)
 
+    # La IA piensa en un hilo aparte; el bucle recoge su turno cuando termina.
+    search = BackgroundSearch()
+    clock = pygame.time.Clock()
+    if AI_PONDER:
+        search.ponder(board)
+
     while True:
+        if PROFILER is not None:
+            PROFILER.start_frame()
+            start = time.perf_counter()
+
+        result = search.result()
+        if result is not None:
+            IA_move(window, grid, width, result)
+
+            # Mientras el jugador piensa, la IA busca sus respuestas probables.
+            if AI_PONDER:
+                search.ponder(board)
+
+        if PROFILER is not None:
+            PROFILER.add("ai", (time.perf_counter() - start) * 1000)
+
         for event in pygame.event.get():
-            # Si se ejecuta un evento QUIT, se cierra el programa.
+            # Si se ejecuta un evento QUIT, se detiene la búsqueda en curso y
+            # se cierra el programa, guardando antes la traza de la medición.
             if event.type == pygame.QUIT:
+                search.cancel()
+                if PROFILER is not None:
+                    PROFILER.dump(PROFILE_TRACE)
                 pygame.quit()
                 sys.exit()
 
+            if PROFILER is not None:
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    PROFILER.click()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                    PROFILER.dump(PROFILE_TRACE)
+                    print(f"Profile trace saved to {PROFILE_TRACE}")
+
+            # Mientras la IA piensa se ignoran los clics del jugador.
+            if search.busy():
+                continue
+
             # Establecemos el título de la ventana de juego.
             pygame.display.set_caption("Crazy Chess | Your turn")
             # Si se presiona el mouse.
@@ -331,7 +609,7 @@ def main(window, width,grid):
                             captured_piece = None
                             
                             # Sigue la IA.
-                            IA_turn(window, grid, width)
+                            IA_turn(window, grid, width, search)
                             movement = ""
                         else:
                             
@@ -373,7 +651,7 @@ def main(window, width,grid):
                             # Si es válido, realizamos el movimiento y actualizamos el tablero.
                             else:
                                 if board.is_capture(move):
-                                    captured_piece = board.piece_at(chess.Square(chess.parse_square(node)))
+                                    captured_piece = chess.Piece(captured_piece_type(board, move), not board.turn)
                                     print(f"Captured: {captured_piece}")
 
                                 board.push(chess.Move.from_uci(movement))
@@ -381,13 +659,22 @@ def main(window, width,grid):
 
                                 if not captured_piece:
                                     # Sigue la IA.
-                                    IA_turn(window, grid, width)
+                                    IA_turn(window, grid, width, search)
                                     grid[prev_x][prev_y].selected = False
                                     movement = ""
-            
+
+        # Dibujamos una vez por cuadro y no por cada evento; solo se actualiza lo
+        # que cambió. Mientras la IA piensa, se muestra su progreso.
+        if search.busy():
+            update_display(window, grid, 8, width, 1, search.progress())
+        else:
             update_display(window, grid, 8, width, 0)
-            
-            #grid = make_grid(8, width)
+
+        if PROFILER is not None:
+            PROFILER.end_frame()
+
+        # Limitamos los cuadros por segundo; entre cuadros el bucle duerme.
+        clock.tick(FRAME_RATE)
             
 def get_node_position(node, width):
     """
@@ -402,22 +689,46 @@ def get_node_position(node, width):
     return int(x), int(y)        
 
 
-def IA_turn(window, grid, width):
+def IA_turn(window, grid, width, search):
+    """
+    Empieza el turno de la IA en segundo plano. El bucle principal lo
+    termina con IA_move cuando la búsqueda devuelve su resultado.
 
+        search : búsqueda en segundo plano (BackgroundSearch).
+    """
     # Actualizar el tablero y sigue la IA.
     
     update_display(window, grid, 8, width, 1)
     # Después del turno del jugador, indicamos que es turno de la IA.
     pygame.display.set_caption("Crazy Chess | IA turn")
+
+    # La máquina selecciona el movimiento a hacer y, si captura, dónde colocar la ficha.
+    if PROFILER is None:
+        search.start(board, movetime=AI_MOVETIME, workers=AI_WORKERS)
+    else:
+        start = time.perf_counter()
+        search.start(board, movetime=AI_MOVETIME, workers=AI_WORKERS)
+        PROFILER.add("ai", (time.perf_counter() - start) * 1000)
+
+
+def IA_move(window, grid, width, result):
+    """
+    Aplica al tablero el turno que eligió la IA.
+
+        result : movimiento en notación UCI y casilla donde se coloca la ficha
+                 robada (None si no hay captura).
+    """
+    movement, square = result
+    # Sin movimientos legales la partida terminó.
+    if not movement:
+        return
+
     # Realizamos una copia del tablero para evaluar si hay captura y obtener la ficha capturada.
     board_copy = board.copy()
-    
-    # La máquina selecciona el movimiento a hacer.
-    movement = machine_move(board_copy)
     # Realiza el movimiento.
     board.push(chess.Move.from_uci(movement))
 
-    is_capture = board_copy.is_capture(chess.Move.from_uci(movement))
+    is_capture = square is not None
     # Calculamos el ancho de cada nodo.
     interval = width / 8
 
@@ -437,10 +748,9 @@ def IA_turn(window, grid, width):
     if is_capture:
         # Actualizar el tablero y coloca la ficha.
         update_display(window, grid, 8, width,1)
-        captured_piece_square = movement[-2:]
-        captured_piece = board_copy.piece_at(chess.Square(chess.parse_square(captured_piece_square)))
+        captured_type = captured_piece_type(board_copy, chess.Move.from_uci(movement))
+        captured_piece = chess.Piece(captured_type, not board_copy.turn)
         print(f"Captured: {captured_piece}")
-        square = put_piece(board.copy(), captured_piece)
         # Se convierte la pieza a formato chess.
         piece = chess.Piece(captured_piece.piece_type, not captured_piece.color)
         # Se coloca la pieza en la casilla seleccionada.
@@ -448,5 +758,70 @@ def IA_turn(window, grid, width):
     update_display(window, grid, 8, width, 1)
     
 
-# Ejecutamos el juego.
-main(WIN, WIDTH,grid=make_grid(8, WIDTH))
\ No newline at end of file
+def init_display():
+    """
+    Crea la ventana del juego y carga las fuentes y las imágenes de las
+    piezas. Importar este módulo no abre ninguna ventana: esto ocurre solo al
+    arrancar el juego con run().
+    """
+    global WIN, font, font2
+
+    pygame.font.init()
+
+    # Creamos una ventana con el ancho y alto definidos.
+    WIN = pygame.display.set_mode((WIDTH + PADDING, WIDTH +PADDING))
+
+    # Establecemos el título de la ventana del programa.
+    pygame.display.set_caption("Crazy Chess")
+
+    font = pygame.font.Font(font_path, 21)
+    font2 = pygame.font.Font(font_path, 22)
+
+    # Cargamos las imágenes de las piezas una sola vez, al tamaño de las casillas.
+    SPRITES.load(WIDTH // 8)
+
+    return WIN
+
+
+def run(profile=None):
+    """
+    Arranca la interfaz y ejecuta el juego.
+
+        profile : archivo (.csv o .json) donde se guarda la traza de la
+                  medición de la interfaz (None para no medir).
+    """
+    global PROFILER, PROFILE_TRACE
+
+    if profile is not None:
+        PROFILER = FrameProfiler()
+        PROFILE_TRACE = profile
+
+    if AI_BOOK is not None and os.path.exists(AI_BOOK):
+        AI.OPENING_BOOK = OpeningBook(AI_BOOK)
+        AI.BOOK_RANDOM = AI_BOOK_RANDOM
+    if AI_CACHE is not None:
+        AI.ANALYSIS_CACHE = AnalysisCache(AI_CACHE)
+
+    window = init_display()
+    main(window, WIDTH, grid=make_grid(8, WIDTH))
+
+
+def profile_argument(arguments):
+    """
+    Devuelve el archivo de la traza si se pidió medir la interfaz con
+    --profile (PROFILE_TRACE) o --profile=archivo, o None en otro caso.
+
+        arguments : argumentos de la línea de órdenes.
+    """
+    for argument in arguments:
+        name, _, path = argument.partition("=")
+        if name == "--profile":
+            return path or PROFILE_TRACE
+
+    return None
+
+
+# Ejecutamos el juego solo al lanzar este archivo, no al importarlo (por
+# ejemplo, desde los procesos trabajadores de la búsqueda paralela).
+if __name__ == "__main__":
+    run(profile_argument(sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,135 @@
+import chess
+
+from utils import PIECE_VALUES
+
+# ============================================================
+#                 ORDENAMIENTO DE MOVIMIENTOS
+# ============================================================
+
+# Valor absoluto de cada tipo de pieza, indexado por chess.PieceType, para
+# ordenar las capturas (víctima más valiosa, atacante menos valioso).
+ORDER_VALUES = [0] + [abs(PIECE_VALUES[chess.piece_symbol(piece_type)]) for piece_type in chess.PIECE_TYPES]
+
+# Prioridades de cada grupo de movimientos. Los valores del historial se
+# mantienen por debajo de KILLER_SCORE para no mezclarse con los otros grupos.
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 26
+HISTORY_LIMIT = 1 << 24
+
+# Número máximo de niveles con movimientos asesinos.
+MAX_PLY = 128
+
+
+class MoveOrderer:
+    """
+    Ordena los movimientos de cada nodo para que la poda alpha-beta encuentre
+    los cortes lo antes posible: primero el movimiento de la tabla de
+    transposiciones, luego las capturas (MVV-LVA), luego los movimientos
+    asesinos del nivel y por último los movimientos tranquilos según el
+    historial.
+    """
+
+    def __init__(self):
+        self.root_ply = 0
+        self.clear()
+
+
+    def clear(self):
+        """
+        Vacía los movimientos asesinos y el historial.
+        """
+        self.killers = [[None, None] for ply in range(MAX_PLY)]
+        self.history = [[[0] * 64 for from_square in chess.SQUARES] for color in chess.COLORS]
+
+
+    def new_search(self, board):
+        """
+        Prepara una nueva búsqueda desde el tablero dado. Los movimientos
+        asesinos se descartan y el historial se reduce a la mitad, para que
+        pese más lo aprendido en la búsqueda actual.
+
+            board : tablero raíz de la búsqueda.
+        """
+        self.root_ply = board.ply()
+        self.killers = [[None, None] for ply in range(MAX_PLY)]
+        for table in self.history:
+            for row in table:
+                row[:] = [value >> 1 for value in row]
+
+
+    def ply(self, board):
+        """
+        Devuelve la distancia en jugadas entre el tablero y la raíz.
+
+            board : tablero de un nodo de la búsqueda.
+        """
+        return board.ply() - self.root_ply
+
+
+    def order_moves(self, board, moves, ply, hash_move=None):
+        """
+        Devuelve los movimientos ordenados de más a menos prometedor.
+
+            board : estado del tablero.
+            moves : lista de movimientos legales (chess.Move).
+            ply : distancia en jugadas a la raíz de la búsqueda.
+            hash_move : mejor movimiento guardado en la tabla de transposiciones.
+        """
+        piece_type_at = board.piece_type_at
+        killer_1, killer_2 = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history[board.turn]
+
+        def priority(move):
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+
+            from_square, to_square = move.from_square, move.to_square
+            attacker = piece_type_at(from_square)
+            victim = piece_type_at(to_square)
+
+            # Captura al paso: el peón cambia de columna hacia una casilla vacía.
+            if not victim and attacker == chess.PAWN and (to_square - from_square) % 8:
+                victim = chess.PAWN
+
+            if victim or move.promotion:
+                gain = ORDER_VALUES[victim or 0] + ORDER_VALUES[move.promotion or 0]
+                return CAPTURE_SCORE + gain * 1024 - ORDER_VALUES[attacker]
+
+            if move == killer_1:
+                return KILLER_SCORE + 1
+            if move == killer_2:
+                return KILLER_SCORE
+
+            return history[from_square][to_square]
+
+        return sorted(moves, key=priority, reverse=True)
+
+
+    def cutoff(self, board, move, ply, depth):
+        """
+        Registra un movimiento que produjo un corte. Solo los movimientos
+        tranquilos se guardan como asesinos y suman al historial.
+
+            board : estado del tablero antes del movimiento.
+            move : movimiento que produjo el corte.
+            ply : distancia en jugadas a la raíz de la búsqueda.
+            depth : profundidad restante del nodo.
+        """
+        if move.promotion or board.piece_type_at(move.to_square):
+            return
+
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+        history = self.history[board.turn]
+        history[move.from_square][move.to_square] += depth * depth
+
+        # Si el historial crece demasiado, se reduce para mantener su escala.
+        if history[move.from_square][move.to_square] > HISTORY_LIMIT:
+            for table in self.history:
+                for row in table:
+                    row[:] = [value >> 1 for value in row]
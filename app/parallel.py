@@ -0,0 +1,305 @@
+import chess
+import math
+import os
+import time
+
+import AI
+from bitboard import Position
+from limits import SearchAborted, SearchLimits
+from transposition import zobrist_hash
+
+# ============================================================
+#                 BÚSQUEDA PARALELA EN LA RAÍZ
+# ============================================================
+
+# Parámetros de la búsqueda que se copian a los procesos trabajadores en cada
+# tarea, para que busquen con la misma configuración que el proceso principal.
+SETTINGS = (
+    "NULL_MOVE_PRUNING", "NULL_MOVE_REDUCTION", "NULL_MOVE_MIN_DEPTH",
+    "LATE_MOVE_REDUCTIONS", "LMR_REDUCTION", "LMR_MIN_DEPTH", "LMR_MIN_INDEX",
+    "DROP_CANDIDATES", "DROP_MARGIN", "DROP_SEARCH_CANDIDATES", "BATCH_EVALUATION",
+)
+
+# Cada cuánto (en segundos) el proceso principal revisa si debe detenerse
+# mientras espera a los trabajadores.
+POLL_INTERVAL = 0.01
+
+# multiprocessing y concurrent.futures se importan al crear el grupo de
+# procesos y no al importar el módulo: tardan casi tanto como el resto del
+# motor y no hacen falta cuando se busca en serie.
+
+# Grupo de procesos persistente y memoria compartida con los trabajadores:
+# [generación de la búsqueda].
+_pool = None
+_pool_workers = 0
+_shared = None
+_generation = 0
+
+
+def default_workers():
+    """
+    Devuelve el número de procesos trabajadores por defecto (uno por núcleo).
+    """
+    return os.cpu_count() or 1
+
+
+def get_pool(workers):
+    """
+    Devuelve el grupo de procesos trabajadores, creándolo la primera vez o si
+    cambia el número de trabajadores. Los procesos se mantienen entre turnos
+    para no pagar su arranque en cada búsqueda.
+
+        workers : número de procesos trabajadores.
+    """
+    global _pool, _pool_workers, _shared
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _shared = multiprocessing.Array('q', [0])
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(_shared,))
+        _pool_workers = workers
+
+    return _pool
+
+
+def shutdown_pool():
+    """
+    Detiene los procesos trabajadores, si los hay.
+    """
+    global _pool, _pool_workers
+
+    if _pool is not None:
+        _shared[0] = 0
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def enabled(workers):
+    """
+    Indica si la búsqueda se reparte entre procesos (hace falta más de un
+    trabajador). Si no, machine_move y put_piece buscan en serie en este proceso.
+
+        workers : número de procesos pedido (None o 1 para buscar en serie).
+    """
+    return bool(workers and workers > 1)
+
+
+def current_settings():
+    """
+    Devuelve los parámetros de búsqueda actuales del proceso principal.
+    """
+    return {name: getattr(AI, name) for name in SETTINGS}
+
+# ============================================================
+#                 PROCESOS TRABAJADORES
+# ============================================================
+
+class WorkerLimits(SearchLimits):
+    """
+    Límites de la búsqueda dentro de un proceso trabajador. Además del tiempo
+    y los nodos, la tarea se detiene en cuanto el proceso principal cambia de
+    generación (la iteración terminó, se canceló o se agotó su presupuesto).
+    """
+
+    generation = 0
+
+    def poll(self):
+        SearchLimits.poll(self)
+
+        if _shared[0] != self.generation:
+            raise SearchAborted()
+
+
+def _init_worker(shared):
+    """
+    Inicializa un proceso trabajador con la memoria compartida.
+
+        shared : arreglo compartido [generación].
+    """
+    global _shared
+    _shared = shared
+    AI.SEARCH_LIMITS = WorkerLimits()
+
+
+def _search_item(fen, uci, depth, bound, beta, generation, movetime, nodes, settings):
+    """
+    Busca un movimiento (o una colocación) de la raíz dentro de un proceso
+    trabajador, con AI.search_isolated y los parámetros de búsqueda del
+    proceso principal. Devuelve su puntuación (None si se interrumpió), la
+    entrada de la colocación que sigue si captura y los nodos buscados.
+
+        fen : posición de la raíz.
+        uci : movimiento a buscar (con drop si es una colocación, "N@e4").
+        depth : profundidad de la iteración.
+        bound : cota que debe superar el movimiento.
+        beta : valor beta de la ventana.
+        generation : generación de la búsqueda en el proceso principal.
+        movetime : tiempo restante en milisegundos (None para no limitar).
+        nodes : nodos restantes (None para no limitar).
+        settings : parámetros de búsqueda del proceso principal.
+    """
+    for name, value in settings.items():
+        setattr(AI, name, value)
+
+    board = Position.from_fen(fen)
+    move = chess.Move.from_uci(uci)
+    score = AI.evaluate_position(board)
+    # En la raíz de una colocación el hash incluye la ficha pendiente (ver AI.put_piece).
+    key = zobrist_hash(board, chess.Piece(move.drop, not board.turn) if move.drop else None)
+    AI.SEARCH_LIMITS.generation = generation
+    AI.SEARCH_LIMITS.start(movetime, nodes)
+
+    if _shared[0] != generation:
+        return None, None, 0
+
+    try:
+        result, entry = AI.search_isolated(board, move, depth, bound, beta, score, key)
+    except SearchAborted:
+        return None, None, AI.SEARCH_LIMITS.nodes
+
+    return result, entry, AI.SEARCH_LIMITS.nodes
+
+# ============================================================
+#                 PROCESO PRINCIPAL
+# ============================================================
+
+def search_root_parallel(board, legal_moves, depth, alpha, beta, score, key, workers):
+    """
+    Equivalente paralelo de AI.search_root. El primer movimiento (la variante
+    principal) se busca en este proceso con las tablas de la búsqueda; el
+    resto se reparte entre los procesos trabajadores con la misma cota y
+    AI.search_isolated, igual que en serie. Devuelve lo mismo que
+    AI.search_root.
+
+        board : tablero de ajedrez.
+        legal_moves : movimientos legales ordenados.
+        depth : profundidad de la iteración.
+        alpha : valor alfa de la ventana de aspiración.
+        beta : valor beta de la ventana de aspiración.
+        score : puntuación del tablero.
+        key : hash de Zobrist del tablero.
+        workers : número de procesos trabajadores.
+    """
+    maximum = AI.alphabeta_pruning(board, legal_moves[0], depth, alpha, beta, False, score, key)
+    results = [maximum] + [-(math.inf)] * (len(legal_moves) - 1)
+    if maximum >= beta or len(legal_moves) == 1:
+        return maximum, legal_moves[0], results, None
+
+    searched = _search_items(board, legal_moves, depth, max(alpha, maximum), beta, workers)
+
+    best_index = 0
+    drop_entry = None
+    for index, (result, entry) in searched.items():
+        results[index] = result
+        if result > maximum or (result == maximum and 0 < index < best_index):
+            best_index, maximum, drop_entry = index, result, entry
+
+    return maximum, legal_moves[best_index], results, drop_entry
+
+
+def search_drops_parallel(board, piece, squares, depth, score, key, workers):
+    """
+    Equivalente paralelo de AI.search_drops. La primera casilla se busca en
+    este proceso con las tablas de la búsqueda; el resto se reparte entre los
+    procesos trabajadores con la misma cota y AI.search_isolated, así que las
+    puntuaciones son las mismas que en serie.
+
+        board : tablero de ajedrez tras la captura.
+        piece : ficha robada (chess.Piece), con el color que tenía antes de
+                ser capturada.
+        squares : casillas candidatas ordenadas.
+        depth : profundidad de la iteración.
+        score : puntuación del tablero.
+        key : hash de Zobrist del tablero, con la ficha pendiente de colocar.
+        workers : número de procesos trabajadores.
+    """
+    drops = [chess.Move(square, square, drop=piece.piece_type) for square in squares]
+    results = [AI.alphabeta_pruning(board, drops[0], depth, -(math.inf), math.inf, False, score, key)]
+    results += [-(math.inf)] * (len(squares) - 1)
+    if results[0] == math.inf or len(squares) == 1:
+        return results
+
+    searched = _search_items(board, drops, depth, results[0] - 1, math.inf, workers)
+    for index, (result, entry) in searched.items():
+        results[index] = result
+
+    return results
+
+
+def _search_items(board, movements, depth, bound, beta, workers):
+    """
+    Reparte entre los procesos trabajadores todos los movimientos de la raíz
+    salvo el primero, con la misma cota y ventana. Devuelve un diccionario
+    {índice: (puntuación, entrada de la colocación)} con los movimientos
+    buscados. Como en serie, si uno supera beta no hacen falta los que le
+    siguen, pero sí los anteriores, ya que en serie se habría detenido en el
+    primero que lo supera.
+
+        board : tablero de la raíz.
+        movements : movimientos (o colocaciones) ordenados.
+        depth : profundidad de la iteración.
+        bound : cota que debe superar cada movimiento.
+        beta : valor beta de la ventana.
+        workers : número de procesos trabajadores.
+    """
+    global _generation
+
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    limits = AI.SEARCH_LIMITS
+    pool = get_pool(workers)
+    _generation += 1
+    _shared[0] = _generation
+
+    # Cada tarea recibe el presupuesto que le queda a la búsqueda.
+    movetime = (limits.deadline - time.perf_counter()) * 1000 if limits.deadline < math.inf else None
+    nodes = limits.max_nodes - limits.nodes if limits.max_nodes < math.inf else None
+    settings = current_settings()
+    fen = board.fen()
+
+    pending = {
+        pool.submit(_search_item, fen, movement.uci(), depth, bound, beta, _generation, movetime, nodes, settings): index
+        for index, movement in enumerate(movements[1:], 1)
+    }
+    searched = {}
+    last = len(movements)
+
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+
+            if limits.stopped or time.perf_counter() >= limits.deadline:
+                raise SearchAborted()
+
+            for future in done:
+                # Las tareas que siguen a una que superó beta ya se descartaron.
+                if future not in pending:
+                    continue
+
+                index = pending.pop(future)
+                result, entry, count = future.result()
+                limits.nodes += count
+
+                if result is None or limits.nodes >= limits.max_nodes:
+                    raise SearchAborted()
+
+                searched[index] = result, entry
+
+                # Si supera beta, los movimientos siguientes no se necesitan.
+                if result >= beta:
+                    last = index
+                    for other in [other for other, later in pending.items() if later > last]:
+                        other.cancel()
+                        del pending[other]
+
+    finally:
+        # Cambiar la generación detiene las tareas que sigan en marcha.
+        for future in pending:
+            future.cancel()
+        _shared[0] = 0
+
+    return {index: result for index, result in searched.items() if index <= last}
@@ -0,0 +1,128 @@
+import argparse
+import sys
+import time
+
+import chess
+
+import AI
+import parallel
+
+from benchmark import load_positions
+
+# ============================================================
+#                 BÚSQUEDA EN SERIE Y EN PARALELO
+# ============================================================
+
+# Profundidad de las búsquedas y números de procesos que se comparan con la
+# búsqueda en serie.
+CHECK_DEPTH = 3
+CHECK_WORKERS = (2, 4)
+
+# Parámetros de la búsqueda selectiva, que se desactivan en la segunda pasada.
+# Con ellos la puntuación de cada movimiento depende de la ventana y de la
+# tabla de transposiciones con que se busca, así que son los que más fácilmente
+# harían que el reparto cambie el resultado.
+SELECTIVE_SETTINGS = ("NULL_MOVE_PRUNING", "LATE_MOVE_REDUCTIONS")
+
+
+def search(fen, symbol, depth, workers):
+    """
+    Busca una posición con las tablas vacías y un grupo de procesos ya
+    arrancado, de modo que cada búsqueda empiece igual y el tiempo no incluya
+    el arranque de los procesos. Devuelve el movimiento (UCI) o la casilla de
+    la colocación, y los segundos que tardó la búsqueda.
+
+        fen : posición.
+        symbol : ficha robada (None si se busca un movimiento).
+        depth : profundidad de la búsqueda.
+        workers : número de procesos (None para buscar en serie).
+    """
+    AI.TRANSPOSITION_TABLE.clear()
+    AI.MOVE_ORDERING.clear()
+    if parallel.enabled(workers):
+        parallel.get_pool(workers)
+
+    board = chess.Board(fen)
+    start = time.perf_counter()
+    if symbol is None:
+        result = AI.machine_move(board, max_depth=depth, workers=workers)
+    else:
+        result = AI.put_piece(board, chess.Piece.from_symbol(symbol), max_depth=depth, workers=workers)
+
+    return result, time.perf_counter() - start
+
+
+def check(positions, depth, workers):
+    """
+    Compara la búsqueda en serie con la búsqueda con cada número de procesos
+    en todas las posiciones. Devuelve la lista de diferencias (FEN, procesos,
+    resultado en serie, resultado en paralelo) y los segundos que tardaron en
+    total las búsquedas con cada número de procesos (None en serie).
+
+        positions : lista de tuplas (FEN, ficha robada o None).
+        depth : profundidad de las búsquedas.
+        workers : números de procesos que se comparan.
+    """
+    mismatches = []
+    times = dict.fromkeys((None,) + tuple(workers), 0)
+
+    # Las búsquedas se agrupan por número de procesos para no arrancar un
+    # grupo de procesos nuevo en cada una.
+    results = {}
+    for count in times:
+        for fen, symbol in positions:
+            results[fen, count], seconds = search(fen, symbol, depth, count)
+            times[count] += seconds
+
+    for fen, symbol in positions:
+        for count in workers:
+            if results[fen, count] != results[fen, None]:
+                mismatches.append((fen, count, results[fen, None], results[fen, count]))
+
+    return mismatches, times
+
+
+def main(argv=None):
+    """
+    Comprueba que la búsqueda en paralelo da el mismo resultado que en serie,
+    con los parámetros por defecto y con la búsqueda selectiva desactivada, y
+    muestra el tiempo total con cada número de procesos. Termina con código 1
+    si hay alguna diferencia.
+    """
+    parser = argparse.ArgumentParser(description="Compara la búsqueda en serie y en paralelo.")
+    parser.add_argument("-d", "--depth", type=int, default=CHECK_DEPTH, help="profundidad de las búsquedas")
+    parser.add_argument("-w", "--workers", type=int, nargs="+", default=CHECK_WORKERS, help="números de procesos")
+    args = parser.parse_args(argv)
+
+    # Las posiciones del banco de pruebas incluyen una colocación y un final en
+    # los que, cuando los trabajadores compartían la mejor cota, repartir la
+    # búsqueda selectiva daba otro resultado.
+    positions = [(position["fen"], position["piece"]) for position in load_positions()]
+
+    defaults = {name: getattr(AI, name) for name in SELECTIVE_SETTINGS}
+    failed = False
+    try:
+        for selective in (True, False):
+            for name in SELECTIVE_SETTINGS:
+                setattr(AI, name, defaults[name] if selective else False)
+
+            label = "por defecto" if selective else "sin búsqueda selectiva"
+            mismatches, times = check(positions, args.depth, args.workers)
+            print(f"{label}: {len(positions) * len(args.workers) - len(mismatches)} de "
+                  f"{len(positions) * len(args.workers)} búsquedas iguales")
+            for fen, count, serial, result in mismatches:
+                print(f"  {fen} con {count} procesos: {result} (en serie {serial})")
+            print("  tiempo: " + ", ".join(f"{'en serie' if count is None else f'{count} procesos'} {seconds:.1f} s"
+                                           for count, seconds in times.items()))
+            failed = failed or bool(mismatches)
+    finally:
+        for name, value in defaults.items():
+            setattr(AI, name, value)
+        parallel.shutdown_pool()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import random
+import sys
+
+import chess
+
+from bitboard import Position, perft
+
+# ============================================================
+#                 PERFT CONTRA PYTHON-CHESS
+# ============================================================
+
+# Posiciones de referencia: la inicial, kiwipete, las posiciones 3 a 6 de la
+# Chess Programming Wiki y dos capturas al paso (una de ellas clavada).
+PERFT_POSITIONS = (
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "8/8/8/2k5/3Pp3/8/8/4K2R b K d3 0 1",
+)
+
+# Profundidad del perft sin colocaciones y con ellas (el árbol con
+# colocaciones crece mucho más deprisa).
+PERFT_DEPTH = 3
+DROP_DEPTH = 2
+
+# Posiciones al azar (jugadas y colocaciones legales desde la inicial) que se
+# comprueban además de las de referencia, y semilla con que se generan.
+RANDOM_POSITIONS = 300
+RANDOM_SEED = 1
+
+
+def reference_perft(board, depth, drops=False):
+    """
+    Perft con python-chess (chess.Board) y las mismas reglas que
+    bitboard.perft: con drops, tras cada captura el jugador que captura
+    coloca la ficha en cada casilla vacía.
+
+        board : tablero (chess.Board).
+        depth : profundidad en jugadas.
+        drops : indica si se incluyen las colocaciones tras las capturas.
+    """
+    if depth == 0:
+        return 1
+
+    nodes = 0
+
+    for move in list(board.legal_moves):
+        captured = None
+        if drops:
+            captured = board.piece_type_at(move.to_square)
+            if not captured and board.is_en_passant(move):
+                captured = chess.PAWN
+
+        board.push(move)
+
+        if captured:
+            # set_piece_at vaciaría la pila de jugadas; _set_piece_at solo
+            # coloca la ficha, así que pop sigue deshaciendo la jugada.
+            color = not board.turn
+            for square in chess.scan_reversed(~board.occupied & chess.BB_ALL):
+                board._set_piece_at(square, captured, color)
+                nodes += reference_perft(board, depth - 1, drops)
+                board._remove_piece_at(square)
+        else:
+            nodes += reference_perft(board, depth - 1, drops)
+
+        board.pop()
+
+    return nodes
+
+
+def random_position(rng):
+    """
+    Devuelve el FEN de una posición al azar de la variante: jugadas legales
+    al azar desde la inicial, colocando cada ficha capturada en una casilla
+    vacía al azar.
+
+        rng : generador de números aleatorios.
+    """
+    board = chess.Board()
+
+    for _ in range(rng.randint(5, 60)):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+
+        move = rng.choice(moves)
+        captured = board.piece_type_at(move.to_square) or (chess.PAWN if board.is_en_passant(move) else None)
+        board.push(move)
+        if captured:
+            square = rng.choice(list(chess.scan_reversed(~board.occupied & chess.BB_ALL)))
+            board.set_piece_at(square, chess.Piece(captured, not board.turn))
+
+    return board.fen()
+
+
+def compare(fen, depth, drops):
+    """
+    Compara bitboard.perft con el de python-chess en una posición. Devuelve
+    los nodos de cada uno (Position, chess.Board); los de Position son None
+    si el perft no dejó la posición como estaba.
+
+        fen : posición.
+        depth : profundidad en jugadas.
+        drops : indica si se incluyen las colocaciones tras las capturas.
+    """
+    position = Position.from_fen(fen)
+    before = position.fen()
+    nodes = perft(position, depth, drops)
+    if position.fen() != before:
+        nodes = None
+
+    return nodes, reference_perft(chess.Board(fen), depth, drops)
+
+
+def main(argv=None):
+    """
+    Comprueba que el generador de bitboard.Position cuenta los mismos nodos
+    que python-chess, con y sin colocaciones, en las posiciones de
+    referencia y en posiciones al azar. Termina con código 1 si hay alguna
+    diferencia.
+    """
+    parser = argparse.ArgumentParser(description="Compara el perft de bitboard con el de python-chess.")
+    parser.add_argument("-d", "--depth", type=int, default=PERFT_DEPTH, help="profundidad sin colocaciones")
+    parser.add_argument("--drop-depth", type=int, default=DROP_DEPTH, help="profundidad con colocaciones")
+    parser.add_argument("--random", type=int, default=RANDOM_POSITIONS, help="posiciones al azar")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="semilla de las posiciones al azar")
+    args = parser.parse_args(argv)
+
+    # Las posiciones de referencia se comprueban a la profundidad pedida; las
+    # posiciones al azar, una jugada menos.
+    checks = [(fen, args.depth, False) for fen in PERFT_POSITIONS]
+    checks += [(fen, args.drop_depth, True) for fen in PERFT_POSITIONS]
+
+    rng = random.Random(args.seed)
+    for _ in range(args.random):
+        fen = random_position(rng)
+        checks += [(fen, max(1, args.depth - 1), False), (fen, max(1, args.drop_depth - 1), True)]
+
+    mismatches = 0
+    for fen, depth, drops in checks:
+        nodes, expected = compare(fen, depth, drops)
+        if nodes != expected:
+            mismatches += 1
+            label = "con colocaciones" if drops else "sin colocaciones"
+            print(f"{fen} ({label}, profundidad {depth}): {nodes} nodos, python-chess {expected}")
+
+    print(f"perft: {len(checks) - mismatches} de {len(checks)} comprobaciones iguales a python-chess")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
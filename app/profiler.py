@@ -0,0 +1,189 @@
+import csv
+import json
+import time
+
+from collections import deque
+
+# ============================================================
+#                 MEDICIÓN DE LA INTERFAZ
+# ============================================================
+
+# Secciones que se miden en cada cuadro, en el orden en que se muestran:
+# el cuadro completo (sin la espera de clock.tick), update_display, el dibujo
+# de las casillas (Node.draw y Node.setup), find_legal_moves, las llamadas a
+# la IA (empezar, recoger y aplicar su turno) y el tiempo entre un clic y el
+# siguiente cuadro mostrado.
+SECTIONS = ("frame", "update_display", "nodes", "find_legal_moves", "ai", "input_latency")
+
+# Cuadros recientes con los que se calculan los percentiles del resumen.
+HISTORY = 300
+
+# Cuadros como máximo que se guardan para volcar la traza (una hora a 30 cuadros por segundo).
+TRACE_FRAMES = 108000
+
+# Cada cuánto (en segundos) se vuelve a escribir el texto del resumen en pantalla.
+OVERLAY_INTERVAL = 0.5
+
+# Posición del resumen en la ventana, tamaño y color del texto, borde derecho
+# de cada columna de números y opacidad del fondo.
+OVERLAY_POSITION = (44, 44)
+OVERLAY_FONT_SIZE = 20
+OVERLAY_COLOUR = (255, 255, 255)
+OVERLAY_COLUMNS = (170, 225, 280)
+OVERLAY_ALPHA = 190
+
+
+def percentile(values, fraction):
+    """
+    Devuelve el percentil de una lista de valores ya ordenada (por el
+    rango más cercano).
+
+        values : valores ordenados de menor a mayor.
+        fraction : percentil entre 0 y 1.
+    """
+    index = max(0, min(len(values) - 1, round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class FrameProfiler:
+    """
+    Mide cuánto tarda cada cuadro de main y cada sección dentro de él, y la
+    latencia entre un clic y el siguiente cuadro mostrado. La latencia se
+    mide desde que el bucle recoge el evento, así que no incluye el tiempo
+    que el evento esperó en la cola (como mucho un cuadro). Guarda una traza
+    de todos los cuadros que se puede volcar a CSV o JSON y dibuja en la
+    ventana un resumen (p50, p95 y máximo) de los cuadros recientes.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.history = {section: deque(maxlen=history) for section in SECTIONS}
+        self.trace = deque(maxlen=TRACE_FRAMES)
+        self.frames = 0
+        self.started = time.perf_counter()
+        self.frame_start = None
+        self.current = {}
+        self.click_time = None
+        self.surface = None
+        self.surface_time = 0.0
+        self.font = None
+
+
+    def start_frame(self):
+        """
+        Empieza a medir un cuadro.
+        """
+        self.frame_start = time.perf_counter()
+        self.current = {}
+
+
+    def add(self, section, ms):
+        """
+        Suma tiempo a una sección del cuadro en curso.
+
+            section : nombre de la sección (de SECTIONS).
+            ms : milisegundos.
+        """
+        self.current[section] = self.current.get(section, 0.0) + ms
+
+
+    def click(self):
+        """
+        Registra un clic. Su latencia se mide al terminar el siguiente cuadro.
+        """
+        if self.click_time is None:
+            self.click_time = time.perf_counter()
+
+
+    def end_frame(self):
+        """
+        Termina el cuadro en curso, ya mostrado en pantalla: guarda el tiempo
+        de cada sección y, si hubo un clic, su latencia.
+        """
+        now = time.perf_counter()
+        if self.frame_start is None:
+            return
+
+        self.current["frame"] = (now - self.frame_start) * 1000
+        if self.click_time is not None:
+            self.current["input_latency"] = (now - self.click_time) * 1000
+            self.click_time = None
+
+        for section, ms in self.current.items():
+            self.history[section].append(ms)
+
+        record = {"index": self.frames, "time_ms": round((self.frame_start - self.started) * 1000, 3)}
+        record.update((section, round(self.current[section], 4)) for section in SECTIONS if section in self.current)
+        self.trace.append(record)
+
+        self.frames += 1
+        self.frame_start = None
+
+
+    def summary(self):
+        """
+        Devuelve, para cada sección con datos, el p50, el p95 y el máximo en
+        milisegundos de los cuadros recientes.
+        """
+        result = {}
+        for section in SECTIONS:
+            values = sorted(self.history[section])
+            if values:
+                result[section] = (percentile(values, 0.5), percentile(values, 0.95), values[-1])
+
+        return result
+
+
+    def overlay(self):
+        """
+        Devuelve una superficie con el resumen para dibujarla sobre la
+        ventana. El texto se vuelve a escribir cada OVERLAY_INTERVAL segundos;
+        entre tanto se devuelve la misma superficie, de modo que la ventana
+        solo la redibuja cuando cambia.
+        """
+        now = time.perf_counter()
+        if self.surface is not None and now - self.surface_time < OVERLAY_INTERVAL:
+            return self.surface
+
+        import pygame
+
+        if self.font is None:
+            self.font = pygame.font.Font(None, OVERLAY_FONT_SIZE)
+
+        # Una fila por sección; los números se alinean a la derecha de cada columna.
+        rows = [("ms", "p50", "p95", "max")]
+        rows += [(section,) + tuple(f"{value:.2f}" for value in values) for section, values in self.summary().items()]
+        line = self.font.size("Xg")[1] + 4
+
+        surface = pygame.Surface((OVERLAY_COLUMNS[-1] + 8, line * len(rows) + 8), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, OVERLAY_ALPHA))
+        for index, row in enumerate(rows):
+            y = 4 + index * line
+            surface.blit(self.font.render(row[0], True, OVERLAY_COLOUR), (6, y))
+            for column, cell in zip(OVERLAY_COLUMNS, row[1:]):
+                text = self.font.render(cell, True, OVERLAY_COLOUR)
+                surface.blit(text, (column - text.get_width(), y))
+
+        self.surface = surface
+        self.surface_time = now
+        return surface
+
+
+    def dump(self, path):
+        """
+        Escribe la traza de los cuadros en un archivo JSON (si termina en
+        .json, junto con el resumen) o CSV (en otro caso), con una fila por
+        cuadro y una columna por sección en milisegundos.
+
+            path : archivo de salida.
+        """
+        if path.endswith(".json"):
+            with open(path, "w") as trace_file:
+                json.dump({"summary": {section: dict(zip(("p50", "p95", "max"), values))
+                                       for section, values in self.summary().items()},
+                           "frames": list(self.trace)}, trace_file, indent=1)
+            return
+
+        with open(path, "w", newline="") as trace_file:
+            writer = csv.DictWriter(trace_file, fieldnames=("index", "time_ms") + SECTIONS)
+            writer.writeheader()
+            writer.writerows(self.trace)
@@ -0,0 +1,310 @@
+import argparse
+import ast
+import json
+import random
+import sys
+import time
+
+import chess
+
+import AI
+import parallel
+
+from book import OpeningBook
+from cache import AnalysisCache
+from ordering import MoveOrderer
+from transposition import TranspositionTable
+
+# ============================================================
+#                 PARTIDAS DE LA MÁQUINA CONTRA SÍ MISMA
+# ============================================================
+
+# Opciones de búsqueda de cada motor y su valor por defecto: además de los
+# límites de la búsqueda, el libro de aperturas (book=archivo), si se elige
+# al azar entre sus jugadas y la caché de análisis (cache=archivo), que pueden
+# compartir todos los procesos. También se acepta cualquier parámetro de
+# parallel.SETTINGS (por ejemplo NULL_MOVE_PRUNING=False).
+SEARCH_OPTIONS = {"depth": AI.MAX_DEPTH, "movetime": None, "nodes": None, "book": None, "book_random": False,
+                  "cache": None}
+
+# Jugadas (medias) tras las que la partida se declara tablas.
+MAX_PLIES = 300
+
+# Veces que se repite una posición para declarar tablas.
+REPETITIONS = 3
+
+# Colores cuyas primeras jugadas se eligen al azar (--random-color).
+RANDOM_COLORS = {"both": chess.COLORS, "white": (chess.WHITE,), "black": (chess.BLACK,)}
+
+# Memoria (MB) de la tabla de transposiciones de cada motor en cada proceso.
+TABLE_SIZE_MB = 8
+
+# Tablas de cada motor dentro de un proceso, que se reutilizan entre partidas.
+_tables = {}
+
+# Libros de aperturas y cachés de análisis abiertos en cada proceso, por archivo.
+_books = {}
+_caches = {}
+
+# Parámetros de búsqueda por defecto, que se restauran antes de aplicar los de
+# cada motor.
+DEFAULT_SETTINGS = parallel.current_settings()
+
+
+def parse_engine(text):
+    """
+    Convierte la descripción de un motor ("depth=2,movetime=50,
+    NULL_MOVE_PRUNING=False") en un diccionario de opciones.
+
+        text : opciones separadas por comas, cada una como nombre=valor.
+    """
+    engine = dict(SEARCH_OPTIONS)
+    engine["settings"] = {}
+
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        try:
+            value = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            # Los archivos del libro y de la caché se pueden escribir sin comillas.
+            if name not in ("book", "cache"):
+                raise argparse.ArgumentTypeError(f"valor no válido en '{item}'")
+            value = value.strip()
+
+        if name in SEARCH_OPTIONS:
+            engine[name] = value
+        elif name in parallel.SETTINGS:
+            engine["settings"][name] = value
+        else:
+            raise argparse.ArgumentTypeError(f"opción desconocida '{name}'")
+
+    engine["name"] = text or "default"
+    return engine
+
+
+def use_engine(index, engine):
+    """
+    Prepara el módulo AI para que juegue un motor: copia sus parámetros y
+    pone sus propias tablas (transposiciones y ordenamiento), de modo que los
+    dos motores de una partida no compartan resultados.
+
+        index : índice del motor en la partida (0 o 1).
+        engine : opciones del motor.
+    """
+    if index not in _tables:
+        _tables[index] = (TranspositionTable(TABLE_SIZE_MB), MoveOrderer())
+    AI.TRANSPOSITION_TABLE, AI.MOVE_ORDERING = _tables[index]
+
+    path = engine["book"]
+    if path is not None and path not in _books:
+        _books[path] = OpeningBook(path)
+    AI.OPENING_BOOK = _books.get(path)
+    AI.BOOK_RANDOM = engine["book_random"]
+
+    path = engine["cache"]
+    if path is not None and path not in _caches:
+        _caches[path] = AnalysisCache(path)
+    AI.ANALYSIS_CACHE = _caches.get(path)
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(engine["settings"])
+    for name, value in settings.items():
+        setattr(AI, name, value)
+
+
+def engine_turn(board, engine):
+    """
+    Busca el turno completo (movimiento y colocación) del jugador que mueve.
+    La búsqueda de AI juega con las negras, así que para las blancas se busca
+    en el tablero reflejado y se refleja el resultado. Devuelve el movimiento,
+    la casilla de la colocación (None si no captura), los milisegundos, los
+    nodos de todo el turno (movimiento y colocación) y la profundidad
+    alcanzada por la búsqueda del movimiento.
+
+        board : tablero de la partida.
+        engine : opciones del motor que mueve.
+    """
+    mirrored = board.turn == chess.WHITE
+    search_board = board.mirror() if mirrored else board
+
+    start = time.perf_counter()
+    movement, square = AI.machine_turn(search_board, engine["movetime"], engine["nodes"], engine["depth"])
+    elapsed = (time.perf_counter() - start) * 1000
+
+    move = chess.Move.from_uci(movement)
+    if mirrored:
+        move = chess.Move(chess.square_mirror(move.from_square), chess.square_mirror(move.to_square), move.promotion)
+        if square is not None:
+            square = chess.square_mirror(square)
+
+    return move, square, elapsed, AI.SEARCH_LIMITS.nodes, AI.SEARCH_LIMITS.depth
+
+
+def game_over(board, seen, plies):
+    """
+    Devuelve el resultado ("1-0", "0-1" o "1/2-1/2") y el motivo si la
+    partida terminó, o None en otro caso.
+
+        board : tablero de la partida.
+        seen : veces que se ha visto cada posición.
+        plies : jugadas (medias) jugadas.
+    """
+    if not any(board.generate_legal_moves()):
+        if board.is_check():
+            return ("0-1" if board.turn == chess.WHITE else "1-0"), "checkmate"
+        return "1/2-1/2", "stalemate"
+    if seen[position_key(board)] >= REPETITIONS:
+        return "1/2-1/2", "repetition"
+    if board.halfmove_clock >= 100:
+        return "1/2-1/2", "fifty-moves"
+    if plies >= MAX_PLIES:
+        return "1/2-1/2", "max-plies"
+
+    return None
+
+
+def position_key(board):
+    """
+    Devuelve una clave de la posición para detectar repeticiones. No se usa
+    la pila de movimientos, que se vacía al colocar una ficha.
+
+        board : tablero de la partida.
+    """
+    return board.board_fen(), board.turn, board.castling_rights, board.ep_square
+
+
+def play_game(number, engines, random_plies, seed, random_colors=chess.COLORS):
+    """
+    Juega una partida completa entre dos motores con las reglas de main:
+    tras una captura, quien captura coloca la ficha con su color en una
+    casilla vacía. Las primeras jugadas se eligen al azar para que las
+    partidas no se repitan. Devuelve un diccionario con el resultado y el
+    tiempo de cada jugada.
+
+        number : número de la partida.
+        engines : opciones de los motores (blancas, negras).
+        random_plies : jugadas (medias) al comienzo en que se juega al azar.
+        seed : semilla de las jugadas al azar.
+        random_colors : colores que juegan al azar en esas jugadas; el otro
+                        busca con su motor desde la primera jugada.
+    """
+    rng = random.Random(seed)
+    board = chess.Board()
+    seen = {}
+    moves = []
+    outcome = None
+
+    for table, ordering in _tables.values():
+        table.clear()
+        ordering.clear()
+
+    while outcome is None:
+        index = 0 if board.turn == chess.WHITE else 1
+        engine = engines[index]
+
+        if len(moves) < random_plies and board.turn in random_colors:
+            move = rng.choice(list(board.legal_moves))
+            captured = AI.captured_piece_type(board, move)
+            board.push(move)
+            square = None
+            if captured:
+                empty = list(chess.SquareSet(~board.occupied & chess.BB_ALL))
+                square = rng.choice(empty)
+                board.set_piece_at(square, chess.Piece(captured, not board.turn))
+            moves.append({"move": move.uci(), "drop": square, "random": True})
+
+        else:
+            use_engine(index, engine)
+            move, square, elapsed, nodes, depth = engine_turn(board, engine)
+            captured_type = AI.captured_piece_type(board, move)
+            board.push(move)
+            if captured_type and square is not None:
+                board.set_piece_at(square, chess.Piece(captured_type, not board.turn))
+            moves.append({"move": move.uci(), "drop": square if captured_type else None,
+                          "ms": round(elapsed, 2), "nodes": nodes, "depth": depth})
+
+        key = position_key(board)
+        seen[key] = seen.get(key, 0) + 1
+        outcome = game_over(board, seen, len(moves))
+
+    result, reason = outcome
+    return {"game": number, "white": engines[0]["name"], "black": engines[1]["name"],
+            "result": result, "reason": reason, "plies": len(moves), "fen": board.fen(), "moves": moves}
+
+
+def score_table(results, names):
+    """
+    Devuelve los puntos de cada motor (1 por victoria, 0.5 por tablas).
+
+        results : resultados de las partidas.
+        names : nombres de los dos motores.
+    """
+    points = {name: 0.0 for name in names}
+    for result in results:
+        if result["result"] == "1/2-1/2":
+            points[result["white"]] += 0.5
+            points[result["black"]] += 0.5
+        else:
+            points[result["white" if result["result"] == "1-0" else "black"]] += 1
+
+    return points
+
+
+def main(argv=None):
+    """
+    Juega las partidas en un grupo de procesos y escribe cada resultado, en
+    cuanto termina, como una línea JSON. Al final escribe el marcador en la
+    salida de errores.
+    """
+    parser = argparse.ArgumentParser(description="Partidas de la máquina contra sí misma, sin interfaz.")
+    parser.add_argument("-n", "--games", type=int, default=10, help="número de partidas")
+    parser.add_argument("-a", "--engine-a", type=parse_engine, default=parse_engine(""),
+                        help="opciones del motor A, por ejemplo 'depth=2,NULL_MOVE_PRUNING=False'")
+    parser.add_argument("-b", "--engine-b", type=parse_engine, default=parse_engine(""),
+                        help="opciones del motor B")
+    parser.add_argument("-w", "--workers", type=int, default=parallel.default_workers(), help="procesos")
+    parser.add_argument("--random-plies", type=int, default=4, help="jugadas al azar al comienzo")
+    parser.add_argument("--random-color", choices=RANDOM_COLORS, default="both",
+                        help="colores que juegan al azar al comienzo (white para construir el libro de las negras)")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de las aperturas al azar")
+    parser.add_argument("-o", "--output", help="archivo de resultados (por defecto, la salida estándar)")
+    args = parser.parse_args(argv)
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    engine_a, engine_b = args.engine_a, args.engine_b
+    if engine_a["name"] == engine_b["name"]:
+        engine_a = dict(engine_a, name="A: " + engine_a["name"])
+        engine_b = dict(engine_b, name="B: " + engine_b["name"])
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    results = []
+    start = time.perf_counter()
+
+    # Cada par de partidas usa la misma apertura, con los colores cambiados.
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = []
+        for number in range(args.games):
+            engines = (engine_a, engine_b) if number % 2 == 0 else (engine_b, engine_a)
+            futures.append(pool.submit(play_game, number, engines, args.random_plies, args.seed * 1000003 + number // 2,
+                                       RANDOM_COLORS[args.random_color]))
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    if output is not sys.stdout:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    points = score_table(results, (engine_a["name"], engine_b["name"]))
+    print(f"{len(results)} partidas en {elapsed:.1f} s ({len(results) / elapsed * 3600:.0f} por hora)", file=sys.stderr)
+    for name, value in points.items():
+        print(f"  {name}: {value} / {len(results)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import time
+
+# ============================================================
+#                 ESTADÍSTICAS DE LA BÚSQUEDA
+# ============================================================
+
+# Profundidad restante máxima que se cuenta por separado en nodes_by_depth.
+MAX_TRACKED_DEPTH = 64
+
+# Contadores de SearchStats que se copian en el registro de cada iteración.
+COUNTERS = ("nodes", "leaves", "cutoffs", "first_cutoffs", "null_cutoffs", "tt_probes", "tt_hits", "evaluations")
+
+
+class SearchStats:
+    """
+    Contadores de una búsqueda (machine_move o put_piece), que AI llena
+    mientras busca: nodos por profundidad restante, hojas, cortes beta y
+    cuántos se produjeron con el primer movimiento, consultas y aciertos de
+    la tabla de transposiciones, evaluaciones y el tiempo de cada iteración
+    de la profundización iterativa. Con workers > 1 solo se cuentan los
+    nodos del proceso principal.
+    """
+
+    __slots__ = ("kind", "started", "elapsed", "nodes_by_depth", "leaves", "cutoffs", "first_cutoffs",
+                 "null_cutoffs", "tt_probes", "tt_hits", "evaluations", "iterations", "_last")
+
+    def __init__(self):
+        self.reset()
+
+
+    def reset(self, kind=None):
+        """
+        Pone a cero los contadores para una nueva búsqueda.
+
+            kind : búsqueda que se mide ("move" o "drop").
+        """
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.nodes_by_depth = [0] * MAX_TRACKED_DEPTH
+        self.leaves = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.null_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.evaluations = 0
+        self.iterations = []
+        self._last = dict.fromkeys(COUNTERS, 0)
+        self._last["ms"] = 0.0
+
+
+    @property
+    def nodes(self):
+        """
+        Número total de nodos buscados.
+        """
+        return sum(self.nodes_by_depth)
+
+
+    @property
+    def first_cutoff_rate(self):
+        """
+        Proporción de los cortes beta que se produjeron con el primer
+        movimiento buscado (None si no hubo cortes). Cuanto más cerca de 1,
+        mejor es el ordenamiento de los movimientos.
+        """
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else None
+
+
+    def iteration(self, depth, completed):
+        """
+        Registra el final de una iteración de la profundización iterativa con
+        lo que se contó durante ella y su duración.
+
+            depth : profundidad de la iteración.
+            completed : False si la iteración se interrumpió por el presupuesto.
+        """
+        current = {name: getattr(self, name) for name in COUNTERS}
+        current["ms"] = (time.perf_counter() - self.started) * 1000
+
+        record = {"depth": depth, "completed": completed}
+        record.update((name, current[name] - self._last[name]) for name in current)
+        record["ms"] = round(record["ms"], 3)
+        self.iterations.append(record)
+        self._last = current
+
+
+    def finish(self):
+        """
+        Registra el tiempo total de la búsqueda.
+        """
+        self.elapsed = (time.perf_counter() - self.started) * 1000
+
+
+    def as_dict(self):
+        """
+        Devuelve las estadísticas como un diccionario que se puede escribir en JSON.
+        """
+        depths = max((depth + 1 for depth, count in enumerate(self.nodes_by_depth) if count), default=0)
+
+        return {
+            "kind": self.kind,
+            "ms": round(self.elapsed, 3),
+            "nodes": self.nodes,
+            "nodes_by_depth": self.nodes_by_depth[:depths],
+            "leaves": self.leaves,
+            "cutoffs": self.cutoffs,
+            "first_cutoff_rate": self.first_cutoff_rate,
+            "null_cutoffs": self.null_cutoffs,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "evaluations": self.evaluations,
+            "iterations": self.iterations,
+        }
+
+
+    def __str__(self):
+        rate = self.first_cutoff_rate
+        cutoffs = f"{self.cutoffs} cortes ({rate:.0%} con el primer movimiento)" if rate is not None else "sin cortes"
+
+        return (f"{self.kind}: {self.nodes} nodos, {self.leaves} hojas, {cutoffs}, "
+                f"tabla {self.tt_hits}/{self.tt_probes}, {len(self.iterations)} iteraciones, {self.elapsed:.1f} ms")
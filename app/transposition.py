@@ -0,0 +1,355 @@
+import chess
+import random
+
+from array import array
+
+# ============================================================
+#                     CLAVES DE ZOBRIST
+# ============================================================
+
+# Las claves se generan con una semilla fija para que el hash de una posición
+# sea el mismo en todas las ejecuciones y en todos los procesos.
+_random = random.Random(20230601)
+
+def _key():
+    return _random.getrandbits(64)
+
+# Una clave por cada pieza en cada casilla: PIECE_KEYS[color][tipo][casilla].
+PIECE_KEYS = [[[_key() for square in chess.SQUARES] for piece_type in range(7)] for color in chess.COLORS]
+
+# Clave que se combina cuando mueven las negras.
+TURN_KEY = _key()
+
+# Una clave por cada combinación de derechos de enroque (a1, h1, a8, h8).
+CASTLING_KEYS = [_key() for index in range(16)]
+
+# Una clave por cada columna de la casilla de captura al paso.
+EP_KEYS = [_key() for file in range(8)]
+
+# Una clave por cada pieza que espera a ser colocada (ficha robada). Así dos
+# tableros iguales con distinta ficha pendiente tienen hashes distintos.
+POCKET_KEYS = [[_key() for piece_type in range(7)] for color in chess.COLORS]
+
+
+def castling_index(castling_rights):
+    """
+    Convierte los derechos de enroque del tablero en un índice de 0 a 15.
+
+        castling_rights : máscara de casillas de torre con derecho a enroque.
+    """
+    return ((castling_rights & 1)
+            | (castling_rights >> 6 & 2)
+            | (castling_rights >> 54 & 4)
+            | (castling_rights >> 60 & 8))
+
+
+def zobrist_hash(board, pocket=None):
+    """
+    Calcula el hash de 64 bits de una posición recorriendo todas sus piezas.
+    Solo se usa al comienzo de la búsqueda; después el hash se actualiza con
+    move_hash y drop_hash.
+
+        board : estado del tablero.
+        pocket : pieza (chess.Piece) pendiente de colocar, si la hay.
+    """
+    key = 0
+
+    # Se recorren las máscaras de cada tipo de pieza, sin crear un chess.Piece por casilla.
+    for color in chess.COLORS:
+        keys = PIECE_KEYS[color]
+        for piece_type in chess.PIECE_TYPES:
+            piece_keys = keys[piece_type]
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                key ^= piece_keys[square]
+
+    if board.turn == chess.BLACK:
+        key ^= TURN_KEY
+
+    key ^= CASTLING_KEYS[castling_index(board.clean_castling_rights())]
+
+    if board.ep_square is not None:
+        key ^= EP_KEYS[board.ep_square & 7]
+
+    if pocket is not None:
+        key ^= POCKET_KEYS[pocket.color][pocket.piece_type]
+
+    return key
+
+
+def move_hash(board, move, key):
+    """
+    Calcula el hash de la posición que resulta de un movimiento, antes de
+    aplicarlo, actualizando solo lo que cambia (igual que move_delta en AI.py).
+
+        board : estado del tablero antes del movimiento.
+        move : movimiento (chess.Move) a aplicar.
+        key : hash del tablero antes del movimiento.
+    """
+    from_square = move.from_square
+    to_square = move.to_square
+
+    # Movimiento nulo: solo cambia el turno y se pierde la captura al paso.
+    if from_square == to_square:
+        if board.ep_square is not None:
+            key ^= EP_KEYS[board.ep_square & 7]
+        return key ^ TURN_KEY
+
+    color = board.turn
+    piece_type = board.piece_type_at(from_square)
+    own = PIECE_KEYS[color]
+
+    key ^= own[piece_type][from_square] ^ own[move.promotion or piece_type][to_square] ^ TURN_KEY
+
+    captured = board.piece_type_at(to_square)
+    if captured:
+        key ^= PIECE_KEYS[not color][captured][to_square]
+
+    elif piece_type == chess.PAWN and (to_square - from_square) % 8:
+        captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+        key ^= PIECE_KEYS[not color][chess.PAWN][captured_square]
+
+    elif piece_type == chess.KING and abs(to_square - from_square) == 2:
+        rank = from_square - from_square % 8
+        if to_square > from_square:
+            key ^= own[chess.ROOK][rank + 7] ^ own[chess.ROOK][rank + 5]
+        else:
+            key ^= own[chess.ROOK][rank] ^ own[chess.ROOK][rank + 3]
+
+    # Se pierden los derechos de enroque de las casillas que se tocan y, si
+    # mueve o se captura un rey, todos los de su color (como en chess.Board.push,
+    # que además descarta primero los derechos que ya no son válidos).
+    if board.castling_rights:
+        rights = board.clean_castling_rights()
+        new_rights = rights & ~(chess.BB_SQUARES[from_square] | chess.BB_SQUARES[to_square])
+        if piece_type == chess.KING:
+            new_rights &= ~(chess.BB_RANK_1 if color == chess.WHITE else chess.BB_RANK_8)
+        elif captured == chess.KING and to_square >> 3 == (7 if color == chess.WHITE else 0):
+            new_rights &= ~(chess.BB_RANK_8 if color == chess.WHITE else chess.BB_RANK_1)
+        if new_rights != rights:
+            key ^= CASTLING_KEYS[castling_index(rights)] ^ CASTLING_KEYS[castling_index(new_rights)]
+
+    # La casilla de captura al paso solo existe tras el avance doble de un peón
+    # desde su fila inicial (un peón colocado en la primera fila no la crea).
+    if board.ep_square is not None:
+        key ^= EP_KEYS[board.ep_square & 7]
+    if (piece_type == chess.PAWN and abs(to_square - from_square) == 16
+            and from_square >> 3 == (1 if color == chess.WHITE else 6)):
+        key ^= EP_KEYS[from_square & 7]
+
+    return key
+
+
+def drop_hash(piece, square, key):
+    """
+    Calcula el hash de la posición tras colocar una pieza en una casilla vacía
+    con set_piece_at.
+
+        piece : pieza (chess.Piece) que se coloca.
+        square : casilla vacía donde se coloca la pieza.
+        key : hash del tablero antes de colocar la pieza.
+    """
+    return key ^ PIECE_KEYS[piece.color][piece.piece_type][square]
+
+
+def pocket_hash(piece, key):
+    """
+    Combina en el hash la pieza que queda pendiente de colocar.
+
+        piece : pieza (chess.Piece) pendiente de colocar.
+        key : hash del tablero.
+    """
+    return key ^ POCKET_KEYS[piece.color][piece.piece_type]
+
+# ============================================================
+#                 TABLA DE TRANSPOSICIONES
+# ============================================================
+
+# Tipos de cota de la puntuación guardada.
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# Memoria por defecto de la tabla, en MB.
+DEFAULT_SIZE_MB = 16
+
+# Bytes que ocupa cada entrada: clave, puntuación, profundidad, cota,
+# movimiento y generación.
+ENTRY_SIZE = (array('Q').itemsize + array('d').itemsize + array('b').itemsize
+              + array('B').itemsize + array('I').itemsize + array('I').itemsize)
+
+# Número de generaciones distintas antes de volver a empezar (ver
+# TranspositionTable.new_generation).
+GENERATIONS = 1 << 32
+
+# Marca de las colocaciones de fichas en la codificación de movimientos.
+DROP_FLAG = 1 << 16
+
+
+def encode_move(move):
+    """
+    Codifica un movimiento como entero para guardarlo en la tabla. El 0 se
+    reserva para indicar que no hay movimiento.
+
+        move : movimiento (chess.Move) o None.
+    """
+    if move is None:
+        return 0
+    return 1 << 15 | move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def encode_drop(square):
+    """
+    Codifica la casilla donde se coloca una ficha como entero.
+
+        square : casilla de la colocación.
+    """
+    return DROP_FLAG | square
+
+
+def decode_move(code):
+    """
+    Decodifica un entero de la tabla. Devuelve None si no hay movimiento, la
+    casilla si es una colocación o un chess.Move en otro caso.
+
+        code : entero guardado en la tabla.
+    """
+    if not code:
+        return None
+    if code & DROP_FLAG:
+        return code & 63
+    return chess.Move(code & 63, code >> 6 & 63, (code >> 12 & 7) or None)
+
+
+class TranspositionTable:
+    """
+    Tabla de transposiciones de tamaño fijo. Cada cubeta tiene dos entradas:
+    la primera se reemplaza solo por búsquedas de igual o mayor profundidad y
+    la segunda se reemplaza siempre. Cada entrada recuerda la generación en
+    que se guardó, y solo se usan las de la generación actual.
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        """
+        Reserva la memoria de la tabla.
+
+            size_mb : memoria máxima de la tabla, en MB.
+        """
+        self.resize(size_mb)
+
+
+    def resize(self, size_mb):
+        """
+        Cambia el tamaño de la tabla y la vacía.
+
+            size_mb : memoria máxima de la tabla, en MB.
+        """
+        # El número de cubetas es la mayor potencia de 2 que cabe en la memoria.
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_SIZE))
+        buckets = 1 << (buckets.bit_length() - 1)
+
+        self.size_mb = size_mb
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(2 * buckets * array('Q').itemsize))
+        self.scores = array('d', bytes(2 * buckets * array('d').itemsize))
+        self.depths = array('b', bytes(2 * buckets))
+        self.flags = array('B', bytes(2 * buckets))
+        self.moves = array('I', bytes(2 * buckets * array('I').itemsize))
+        self.generations = array('I', bytes(2 * buckets * array('I').itemsize))
+        self.generation = 0
+        self.reset_counters()
+
+
+    def clear(self):
+        """
+        Vacía la tabla sin cambiar su tamaño.
+        """
+        self.resize(self.size_mb)
+
+
+    def new_generation(self):
+        """
+        Empieza una nueva generación. Desde ese momento la tabla se comporta
+        como si estuviera vacía: las entradas anteriores no se encuentran y se
+        reemplazan sin importar su profundidad. Es lo mismo que clear(), pero
+        sin recorrer la memoria de la tabla.
+        """
+        self.generation = (self.generation + 1) % GENERATIONS
+
+
+    def reset_counters(self):
+        """
+        Reinicia los contadores de consultas, aciertos, escrituras y colisiones.
+        """
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+
+    def probe(self, key):
+        """
+        Busca una posición en la tabla. Devuelve la tupla
+        (profundidad, puntuación, cota, movimiento) o None si no está.
+
+            key : hash de la posición.
+        """
+        self.probes += 1
+        index = (key & self.mask) << 1
+        keys = self.keys
+        flags = self.flags
+        generations = self.generations
+        generation = self.generation
+
+        if keys[index] != key or not flags[index] or generations[index] != generation:
+            index += 1
+            if keys[index] != key or not flags[index] or generations[index] != generation:
+                return None
+
+        self.hits += 1
+        return self.depths[index], self.scores[index], self.flags[index], self.moves[index]
+
+
+    def store(self, key, depth, score, flag, move):
+        """
+        Guarda el resultado de la búsqueda de una posición.
+
+            key : hash de la posición.
+            depth : profundidad con la que se buscó la posición.
+            score : puntuación obtenida.
+            flag : tipo de cota (EXACT, LOWER o UPPER).
+            move : mejor movimiento codificado (0 si no hay).
+        """
+        index = (key & self.mask) << 1
+        generation = self.generation
+
+        # La entrada preferida por profundidad solo se reemplaza si la posición
+        # es la misma, la nueva búsqueda es igual o más profunda o la entrada es
+        # de otra generación.
+        if (self.flags[index] and self.generations[index] == generation
+                and self.keys[index] != key and depth < self.depths[index]):
+            index += 1
+
+        if self.flags[index] and self.generations[index] == generation and self.keys[index] != key:
+            self.collisions += 1
+
+        self.stores += 1
+        self.generations[index] = generation
+        self.keys[index] = key
+        self.scores[index] = score
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.moves[index] = move
+
+
+    def stats(self):
+        """
+        Devuelve los contadores de la tabla en un diccionario.
+        """
+        return {
+            "size_mb": self.size_mb,
+            "entries": len(self.keys),
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "collisions": self.collisions,
+        }